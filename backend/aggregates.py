@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+def entry_counts(entry):
+    """Flatten one analysis entry into the counters /platform-stats reports."""
+    counts = Counter({"total_analyses": 1, "total_comments": entry["stats"]["total_comments"]})
+    for sentiment, count in entry["stats"]["sentiment"].items():
+        counts[f"sentiment_{sentiment}"] += count
+    for emotion, count in entry["stats"]["emotion"].items():
+        counts[f"emotion_{emotion}"] += count
+    return counts
+
+
+def entry_time(entry):
+    # Timestamps are stored as naive UTC ISO strings
+    return datetime.fromisoformat(entry["timestamp"]).replace(tzinfo=timezone.utc).timestamp()
+
+
+class RingWindow:
+    """Rolling sum over the last `slots` time slots of `slot_seconds` each.
+
+    Slots live in a fixed-size ring and are recycled as time moves on. A
+    running total is kept alongside, so a read only walks the ring when
+    some slot has just fallen out of the window.
+    """
+
+    def __init__(self, slot_seconds, slots):
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        self._ring = [Counter() for _ in range(slots)]
+        self._ring_ids = [None] * slots
+        self._total = Counter()
+        self._oldest = None  # oldest slot id that may still hold counts
+
+    def _expire(self, now_slot):
+        first_live = now_slot - self.slots + 1
+        if self._oldest is None or self._oldest >= first_live:
+            return
+        for index, slot_id in enumerate(self._ring_ids):
+            if slot_id is not None and slot_id < first_live:
+                self._total.subtract(self._ring[index])
+                self._ring[index] = Counter()
+                self._ring_ids[index] = None
+        self._oldest = min((i for i in self._ring_ids if i is not None), default=None)
+
+    def add(self, timestamp, counts, now=None):
+        now_slot = int((now or time.time()) // self.slot_seconds)
+        slot_id = int(timestamp // self.slot_seconds)
+        self._expire(now_slot)
+        if slot_id <= now_slot - self.slots:
+            return  # already outside the window
+
+        index = slot_id % self.slots
+        if self._ring_ids[index] != slot_id:
+            if self._ring_ids[index] is not None:
+                self._total.subtract(self._ring[index])
+            self._ring[index] = Counter()
+            self._ring_ids[index] = slot_id
+        self._ring[index].update(counts)
+        self._total.update(counts)
+        self._oldest = slot_id if self._oldest is None else min(self._oldest, slot_id)
+
+    def total(self, now=None):
+        self._expire(int((now or time.time()) // self.slot_seconds))
+        return +self._total  # drops zeroed keys
+
+
+class PlatformAggregates:
+    """Running per-platform totals plus last hour/day/week rollups.
+
+    New analyses are folded in once, by reading only the stored rows added
+    since the last refresh, so reads cost the same however long the
+    history gets and stay in step with other workers writing to the store.
+    Analyses that retention removed (in whichever worker) are read back from
+    the store's removal log and subtracted again, so every worker reports the
+    totals of the rows actually stored.
+    """
+
+    WINDOWS = {
+        "hour": (60, 60),      # 60 one-minute slots
+        "day": (3600, 24),     # 24 one-hour slots
+        "week": (3600, 168)    # 168 one-hour slots
+    }
+
+    def __init__(self, store):
+        self.store = store
+        self._totals = {}
+        self._windows = {}
+        self._last_id = 0
+        self._removed_seq = 0
+        self._lock = threading.Lock()
+
+    def _platform(self, platform):
+        if platform not in self._totals:
+            self._totals[platform] = Counter()
+            self._windows[platform] = {
+                name: RingWindow(slot_seconds, slots)
+                for name, (slot_seconds, slots) in self.WINDOWS.items()
+            }
+
+    def _apply(self, entry, counts):
+        platform = entry["platform"]
+        timestamp = entry_time(entry)
+        self._platform(platform)
+        totals = self._totals[platform]
+        totals.update(counts)
+        for key in [key for key, value in totals.items() if value <= 0]:
+            del totals[key]
+        for window in self._windows[platform].values():
+            window.add(timestamp, counts)
+
+    def refresh(self):
+        # One snapshot for both logs, so a row is never both missed and subtracted
+        with self._lock, self.store.snapshot():
+            first_seq, last_seq = self.store.removal_log()
+            missed = self._removed_seq < last_seq and (first_seq is None or first_seq > self._removed_seq + 1)
+            if self._last_id and missed:
+                logger.info("Removals were trimmed from the log before this worker saw them; rebuilding stats")
+                self._totals, self._windows, self._last_id = {}, {}, 0
+
+            # Only rows this worker has added: later ids were removed before it read them
+            for _, entry in self.store.iter_removed(after_seq=self._removed_seq):
+                if entry["analysis_id"] <= self._last_id:
+                    self._apply(entry, Counter({key: -value for key, value in entry_counts(entry).items()}))
+            self._removed_seq = last_seq
+
+            for entry in self.store.iter_entries(after_id=self._last_id):
+                self._apply(entry, entry_counts(entry))
+                self._last_id = entry["analysis_id"]
+
+    def stats(self, platform, window=None) -> Counter:
+        """Counters for one platform, all-time or for "hour", "day" or "week"."""
+        self.refresh()
+        with self._lock:
+            self._platform(platform)
+            if window is None:
+                return Counter(self._totals[platform])
+            return self._windows[platform][window].total()
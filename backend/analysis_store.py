@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_DB = os.getenv("ANALYSIS_DB", "data/janvichaar.db")
+# Analyses older than this many days are dropped (0 keeps them forever)
+ANALYSIS_RETENTION_DAYS = float(os.getenv("ANALYSIS_RETENTION_DAYS", "90"))
+# Hard cap on stored analyses; the oldest go first (0 means no cap)
+ANALYSIS_MAX_ROWS = int(os.getenv("ANALYSIS_MAX_ROWS", "100000"))
+# Seconds between retention/compaction passes
+ANALYSIS_MAINTENANCE_INTERVAL = float(os.getenv("ANALYSIS_MAINTENANCE_INTERVAL", "3600"))
+# Days removed analyses stay in the removal log that running aggregates catch up from
+ANALYSIS_REMOVAL_LOG_DAYS = float(os.getenv("ANALYSIS_REMOVAL_LOG_DAYS", "7"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform TEXT NOT NULL,
+    url TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    total_comments INTEGER NOT NULL,
+    sentiment TEXT NOT NULL,
+    emotion TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_platform_timestamp ON analyses (platform, timestamp);
+CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses (timestamp);
+CREATE TABLE IF NOT EXISTS analysis_results (
+    analysis_id INTEGER PRIMARY KEY,
+    results BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS removed_analyses (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    url TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    total_comments INTEGER NOT NULL,
+    sentiment TEXT NOT NULL,
+    emotion TEXT NOT NULL,
+    removed TEXT NOT NULL
+);
+"""
+
+
+class AnalysisStore:
+    """Append-only SQLite store of analysis summaries.
+
+    The database runs in WAL mode so several uvicorn workers can append to
+    and read from the same file. Each thread (and each forked process) opens
+    its own connection on first use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def append(self, entry) -> int:
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO analyses (platform, url, timestamp, total_comments, sentiment, emotion) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    entry["platform"],
+                    entry["url"],
+                    entry["timestamp"],
+                    entry["stats"]["total_comments"],
+                    json.dumps(entry["stats"]["sentiment"]),
+                    json.dumps(entry["stats"]["emotion"])
+                )
+            )
+        return cursor.lastrowid
+
+    def save_results(self, analysis_id, results):
+        # Per-comment results for /filter-comments, stored as compressed JSON
+        payload = zlib.compress(json.dumps(results, separators=(",", ":")).encode("utf-8"))
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_results (analysis_id, results) VALUES (?, ?)",
+                (analysis_id, payload)
+            )
+
+    def load_results(self, analysis_id):
+        row = self._conn().execute(
+            "SELECT results FROM analysis_results WHERE analysis_id = ?", (analysis_id,)
+        ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    @staticmethod
+    def _entry(row):
+        analysis_id, platform, url, timestamp, total_comments, sentiment, emotion = row
+        return {
+            "analysis_id": analysis_id,
+            "platform": platform,
+            "url": url,
+            "timestamp": timestamp,
+            "stats": {
+                "total_comments": total_comments,
+                "sentiment": json.loads(sentiment),
+                "emotion": json.loads(emotion)
+            }
+        }
+
+    def history(self, limit=5, before=None, platform=None):
+        """Newest-first page of analyses plus the cursor for the next page (None at the end)."""
+        query = "SELECT id, platform, url, timestamp, total_comments, sentiment, emotion FROM analyses"
+        clauses, params = [], []
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(before)
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._conn().execute(query, params).fetchall()
+        entries = [self._entry(row) for row in rows[:limit]]
+        next_cursor = entries[-1]["analysis_id"] if len(rows) > limit else None
+        return entries, next_cursor
+
+    def iter_entries(self, since=None, after_id=None):
+        query = "SELECT id, platform, url, timestamp, total_comments, sentiment, emotion FROM analyses"
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        for row in self._conn().execute(query + " ORDER BY id", params):
+            yield self._entry(row)
+
+    @contextmanager
+    def snapshot(self):
+        """Read transaction: every query in the block sees the same state of the database."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            conn.execute("COMMIT")
+
+    def removal_log(self):
+        """(first seq still in the removal log or None, last seq ever logged or 0)."""
+        conn = self._conn()
+        first = conn.execute("SELECT MIN(seq) FROM removed_analyses").fetchone()[0]
+        last = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'removed_analyses'").fetchone()
+        return first, last[0] if last else 0
+
+    def iter_removed(self, after_seq=0):
+        """(seq, entry) for each analysis retention removed, in removal order."""
+        rows = self._conn().execute(
+            "SELECT seq, id, platform, url, timestamp, total_comments, sentiment, emotion "
+            "FROM removed_analyses WHERE seq > ? ORDER BY seq", (after_seq,)
+        )
+        for row in rows:
+            yield row[0], self._entry(row[1:])
+
+    def apply_retention(self, retention_days=ANALYSIS_RETENTION_DAYS, max_rows=ANALYSIS_MAX_ROWS):
+        """Drop analyses past the age or row limits; returns how many were removed.
+
+        Removed rows are logged in removed_analyses first, so every worker's
+        running aggregates can take them back out.
+        """
+        conn = self._conn()
+        now = datetime.utcnow()
+        removed = 0
+        conditions = []
+        if retention_days > 0:
+            conditions.append(("timestamp < ?", ((now - timedelta(days=retention_days)).isoformat(),)))
+        if max_rows > 0:
+            conditions.append(("id <= (SELECT id FROM analyses ORDER BY id DESC LIMIT 1 OFFSET ?)", (max_rows,)))
+        with conn:
+            for condition, params in conditions:
+                conn.execute(
+                    "INSERT INTO removed_analyses "
+                    "(id, platform, url, timestamp, total_comments, sentiment, emotion, removed) "
+                    "SELECT id, platform, url, timestamp, total_comments, sentiment, emotion, ? "
+                    f"FROM analyses WHERE {condition} ORDER BY id",
+                    (now.isoformat(),) + params
+                )
+                removed += conn.execute(f"DELETE FROM analyses WHERE {condition}", params).rowcount
+            # Results go with their analysis
+            conn.execute(
+                "DELETE FROM analysis_results WHERE analysis_id NOT IN (SELECT id FROM analyses)"
+            )
+            conn.execute(
+                "DELETE FROM removed_analyses WHERE removed < ?",
+                ((now - timedelta(days=ANALYSIS_REMOVAL_LOG_DAYS)).isoformat(),)
+            )
+        return removed
+
+    def compact(self):
+        """Fold the WAL back into the database file and release free pages."""
+        conn = self._conn()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+
+    def maintain(self):
+        removed = self.apply_retention()
+        if removed:
+            self.compact()
+            logger.info(f"Retention removed {removed} analyses")
+        return removed
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+analysis_store = AnalysisStore(ANALYSIS_DB)
@@ -1,31 +1,44 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from collections import Counter
+from contextlib import nullcontext
 from typing import Optional, Dict, List
 import logging
 from datetime import datetime
-import random
+import asyncio
+import bisect
+import itertools
+import json
 import os
 
-app = FastAPI()
-
-# ✅ Mount the frontend directory
-app.mount("/", StaticFiles(directory="frontend", html=True), name="static")
+from backend.aggregates import PlatformAggregates
+from backend.analysis_store import analysis_store, ANALYSIS_MAINTENANCE_INTERVAL
+from backend.fetch_reddit import get_reddit_comments, iter_reddit_comments
+from backend.fetch_youtube import get_youtube_comments, iter_youtube_comments
+from backend.inference_cache import inference_cache
+from backend.inference_pool import inference_pool, fetch_pool, PoolSaturated, PoolTimeout
+from backend.jobs import JobRunner, job_store, detect_platform, JOB_MAX_ITEMS
+from backend.metrics import registry as metrics_registry, current_platform, stage_seconds, analyses_total
+from backend.model_registry import model_registry, MODEL_LOADING
+from backend.profiler import SamplingProfiler, PROFILING_ENABLED
+from backend.result_columns import ResultColumns, CONFIDENCE_BOUNDS, CONFIDENCE_LABELS
+from backend.result_store import ResultStore
+from backend.snapshot import SnapshotRefresher
+from backend.sentiment_model import (
+    analyze_comments, predict_sentiment_labels, schedulers,
+    sentiment_map as model_sentiment_map, emotion_map as model_emotion_map
+)
+from backend.trends import TrendEngine, TREND_HISTORY_HOURS
 
+app = FastAPI()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-sentiment_map = {
-    "POSITIVE": "positive",
-    "NEGATIVE": "negative",
-    "NEUTRAL": "neutral"
-}
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -42,11 +55,54 @@ class FilterRequest(BaseModel):
     keyword: str
     filter_type: str
     limit: Optional[int] = 20
+    analysis_id: int  # from the /analyze response; results are only served per analysis
+    cursor: Optional[int] = None
 
 class PlatformStatsRequest(BaseModel):
     platform: str
 
-analysis_history = []
+class JobItem(BaseModel):
+    input: str
+    platform: Optional[str] = None  # detected from the URL when omitted
+
+class JobRequest(BaseModel):
+    items: List[JobItem]
+
+# Scored comments per analysis for /filter-comments
+result_store = ResultStore(analysis_store)
+
+# Running /platform-stats totals, fed from the analysis store
+platform_aggregates = PlatformAggregates(analysis_store)
+
+# Streaming /analyze: comments per scored micro-batch and per analysis
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "32"))
+STREAM_MAX_COMMENTS = int(os.getenv("STREAM_MAX_COMMENTS", "200"))
+
+# Comments echoed back as samples in /analyze responses
+SAMPLE_COMMENTS = int(os.getenv("SAMPLE_COMMENTS", "10"))
+
+# Dashboard /latest-comments feed: sources, size and refresh schedule (seconds)
+LATEST_YOUTUBE_URL = os.getenv("LATEST_YOUTUBE_URL", "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+LATEST_REDDIT_URL = os.getenv("LATEST_REDDIT_URL", "https://www.reddit.com/r/Python/comments/")
+LATEST_COMMENTS_PER_PLATFORM = int(os.getenv("LATEST_COMMENTS_PER_PLATFORM", "5"))
+LATEST_REFRESH_INTERVAL = float(os.getenv("LATEST_REFRESH_INTERVAL", "300"))
+LATEST_MAX_AGE = float(os.getenv("LATEST_MAX_AGE", "600"))
+# How long the first viewer waits for the very first snapshot
+LATEST_FIRST_WAIT = float(os.getenv("LATEST_FIRST_WAIT", "30"))
+
+# Scrape-time gauges for /metrics
+metrics_registry.gauge(
+    "janvichaar_pool_queue_depth", "Calls running or waiting in a worker pool", labels=("pool",),
+    collect=lambda: {("inference",): inference_pool.queue_depth, ("fetch",): fetch_pool.queue_depth}
+)
+metrics_registry.gauge(
+    "janvichaar_batch_queue_depth", "Texts waiting for a model batch", labels=("model",),
+    collect=lambda: {(kind,): scheduler.stats()["queue_depth"] for kind, scheduler in schedulers.items()}
+)
+metrics_registry.gauge(
+    "janvichaar_model_memory_bytes", "Approximate weight memory of each loaded model", labels=("model",),
+    collect=lambda: {(kind,): size for kind, size in model_registry.memory_bytes().items()}
+)
 
 sentiment_score_map = {
     "positive": 3,
@@ -54,6 +110,14 @@ sentiment_score_map = {
     "negative": 1
 }
 
+# Hourly /sentiment-trends series, fed from the analysis store
+trend_engine = TrendEngine(
+    analysis_store,
+    sentiment_labels=sorted({label.lower() for label in model_sentiment_map.values()}),
+    emotion_labels=sorted({label.lower() for label in model_emotion_map.values()}),
+    sentiment_scores=sentiment_score_map
+)
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
@@ -64,181 +128,317 @@ async def generic_exception_handler(request: Request, exc: Exception):
     return JSONResponse(status_code=500, content={"error": "An unexpected error occurred"})
 
 @app.post("/analyze")
-async def analyze(request: AnalyzeRequest):
+async def analyze(request: AnalyzeRequest, profile: bool = False):
     platform = request.platform.lower()
     user_input = request.input.strip()
 
     logger.info(f"Analyzing {platform} content from: {user_input}")
 
-    try:
-        if platform == "youtube":
-            comments = get_youtube_comments(user_input)
-        elif platform == "reddit":
-            comments = get_reddit_comments(user_input)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported platform")
-
-        if not comments:
-            raise HTTPException(status_code=404, detail="No comments found")
+    if platform == "youtube":
+        fetch = get_youtube_comments
+    elif platform == "reddit":
+        fetch = get_reddit_comments
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported platform")
 
-        results, categorized = analyze_comments(comments)
+    if profile and not PROFILING_ENABLED:
+        raise HTTPException(status_code=400, detail="Profiling is disabled (set PROFILING_ENABLED=1)")
 
-        app.state.categorized_data = categorized
-        analysis_entry = {
-            "platform": platform,
+    profiler = SamplingProfiler() if profile else None
+    current_platform.set(platform)
+    status = "error"
+    try:
+        with profiler or nullcontext(), stage_seconds.time(stage="request", platform=platform):
+            with stage_seconds.time(stage="fetch", platform=platform):
+                comments = await fetch_pool.run(fetch, user_input)
+
+            if not comments:
+                status = "empty"
+                raise HTTPException(status_code=404, detail="No comments found")
+
+            with stage_seconds.time(stage="analyze", platform=platform):
+                results, columns = await inference_pool.run(analyze_comments, comments)
+            analysis_entry, analysis_id = await asyncio.to_thread(
+                _record_analysis, platform, user_input, results, columns
+            )
+            status = "ok"
+
+        response = {
+            "platform": platform.capitalize(),
             "url": user_input,
-            "timestamp": datetime.utcnow().isoformat(),
-            "stats": {
-                "total_comments": len(comments),
-                "sentiment": Counter(item["sentiment"]["label"].lower() for item in results),
-                "emotion": Counter(item["emotion"]["label"].lower() for item in results)
-            }
+            **_summarize_results(results, columns),
+            "analysis_id": analysis_id,
+            "timestamp": analysis_entry["timestamp"]
         }
-        analysis_history.append(analysis_entry)
-
-        sentiment_counts = Counter()
-        emotion_counts = Counter()
-        sample_comments = []
-
-        for item in results:
-            sentiment_label = item["sentiment"]["label"].lower()
-            emotion_label = item["emotion"]["label"].lower()
-
-            sentiment_counts[sentiment_label] += 1
-            emotion_counts[emotion_label] += 1
-
-            sample_comments.append({
-                "text": item["text"],
-                "sentiment": {
-                    "label": sentiment_label,
-                    "score": item["sentiment"]["score"],
-                    "confidence": classify_confidence(item["sentiment"]["score"])
-                },
-                "emotion": {
-                    "label": emotion_label,
-                    "score": item["emotion"]["score"],
-                    "confidence": classify_confidence(item["emotion"]["score"])
-                }
+        if profiler:
+            response["profile"] = profiler.report()
+        return response
+
+    except HTTPException:
+        raise
+    except PoolSaturated:
+        status = "rejected"
+        raise HTTPException(status_code=503, detail="Server is busy, please retry shortly")
+    except PoolTimeout:
+        status = "timeout"
+        raise HTTPException(status_code=504, detail="Analysis timed out")
+    except Exception as e:
+        logger.error(f"Analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    finally:
+        analyses_total.inc(platform=platform, status=status)
+
+@app.post("/analyze/stream")
+async def analyze_stream(request: AnalyzeRequest):
+    platform = request.platform.lower()
+    user_input = request.input.strip()
+
+    if platform == "youtube":
+        comment_iter = iter_youtube_comments(user_input, STREAM_MAX_COMMENTS)
+    elif platform == "reddit":
+        comment_iter = iter_reddit_comments(user_input, STREAM_MAX_COMMENTS)
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported platform")
+
+    logger.info(f"Streaming {platform} analysis of: {user_input}")
+    return StreamingResponse(
+        _stream_analysis(platform, user_input, comment_iter),
+        media_type="application/x-ndjson"
+    )
+
+async def _stream_analysis(platform, user_input, comment_iter):
+    """Yield NDJSON events: a "progress" aggregate per scored micro-batch, then "done" (or "error")."""
+    results = []
+    column_parts = []
+    pending = None
+
+    def event(payload):
+        return json.dumps(payload) + "\n"
+
+    current_platform.set(platform)
+    status = "error"
+    try:
+        # Fetch the next micro-batch while the current one is being scored
+        pending = asyncio.ensure_future(fetch_pool.run(_next_batch, comment_iter, STREAM_BATCH_SIZE))
+        while True:
+            # Only the time spent waiting on the fetch counts; the rest overlaps scoring
+            with stage_seconds.time(stage="fetch", platform=platform):
+                batch = await pending
+            if not batch:
+                break
+            pending = asyncio.ensure_future(fetch_pool.run(_next_batch, comment_iter, STREAM_BATCH_SIZE))
+
+            with stage_seconds.time(stage="analyze", platform=platform):
+                batch_results, batch_columns = await inference_pool.run(analyze_comments, batch)
+            results.extend(batch_results)
+            column_parts.append(batch_columns)
+            columns = ResultColumns.concat(column_parts)
+
+            yield event({
+                "type": "progress",
+                "platform": platform.capitalize(),
+                "url": user_input,
+                **_summarize_results(results, columns)
             })
 
-        return {
+        if not results:
+            status = "empty"
+            yield event({"type": "error", "error": "No comments found"})
+            return
+
+        analysis_entry, analysis_id = await asyncio.to_thread(
+            _record_analysis, platform, user_input, results, columns
+        )
+        status = "ok"
+        yield event({
+            "type": "done",
             "platform": platform.capitalize(),
             "url": user_input,
-            "comments_analyzed": len(comments),
-            "sentiment_stats": normalize_stats(dict(sentiment_counts), len(comments)),
-            "emotion_stats": normalize_stats(dict(emotion_counts), len(comments)),
-            "sample_comments": sample_comments[:10],
-            "analysis_id": len(analysis_history) - 1,
+            **_summarize_results(results, columns),
+            "analysis_id": analysis_id,
             "timestamp": analysis_entry["timestamp"]
-        }
-
+        })
+
+    except PoolSaturated:
+        status = "rejected"
+        yield event({"type": "error", "error": "Server is busy, please retry shortly"})
+    except PoolTimeout:
+        status = "timeout"
+        yield event({"type": "error", "error": "Analysis timed out"})
     except Exception as e:
-        logger.error(f"Analysis failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        logger.error(f"Streaming analysis failed: {str(e)}")
+        yield event({"type": "error", "error": f"Analysis failed: {str(e)}"})
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+        analyses_total.inc(platform=platform, status=status)
 
 @app.post("/filter-comments")
 async def filter_comments(request: FilterRequest):
     keyword = request.keyword.lower()
     filter_type = request.filter_type.lower()
-    limit = request.limit
+    limit = max(1, min(request.limit or 20, 100))
+    cursor = max(0, request.cursor or 0)
 
     if filter_type not in ['sentiment', 'emotion']:
         raise HTTPException(status_code=400, detail="Invalid filter type")
 
-    if not hasattr(app.state, 'categorized_data'):
-        raise HTTPException(status_code=400, detail="No analysis data available")
+    analysis_id = request.analysis_id
+    analysis = await asyncio.to_thread(result_store.get, analysis_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Analysis not found or expired")
 
-    filtered = app.state.categorized_data[filter_type].get(keyword, [])
+    comments, count, next_cursor = analysis.page(filter_type, keyword, limit, cursor)
 
     return {
+        "analysis_id": analysis_id,
         "keyword": keyword,
         "type": filter_type,
-        "count": len(filtered),
-        "comments": filtered[:limit]
+        "count": count,
+        "comments": comments,
+        "next_cursor": next_cursor
     }
 
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(request.items) > JOB_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {JOB_MAX_ITEMS} URLs per job")
+
+    items = []
+    for position, item in enumerate(request.items):
+        url = item.input.strip()
+        platform = item.platform.lower() if item.platform else detect_platform(url)
+        if platform not in ("youtube", "reddit"):
+            raise HTTPException(status_code=400, detail=f"Unsupported platform for item {position}: {url}")
+        items.append((platform, url))
+
+    job_id = await asyncio.to_thread(job_store.create_job, items)
+    job_runner.notify()
+    logger.info(f"Queued job {job_id} with {len(items)} URLs")
+    return {"job_id": job_id, "status": "queued", "total": len(items)}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/analysis-history")
-async def get_analysis_history(limit: int = 5):
+async def get_analysis_history(limit: int = 5, before: Optional[int] = None, platform: Optional[str] = None):
+    # Newest first; pass next_cursor back as `before` for the next page
+    history, next_cursor = await asyncio.to_thread(
+        analysis_store.history,
+        limit=max(1, min(limit, 100)),
+        before=before,
+        platform=platform.lower() if platform else None
+    )
     return {
-        "history": analysis_history[-limit:][::-1]
+        "history": history,
+        "next_cursor": next_cursor
     }
 
 @app.get("/platform-stats")
-async def get_platform_stats():
-    platform_stats = {"reddit": Counter(), "youtube": Counter()}
-
-    for entry in analysis_history:
-        platform = entry["platform"]
-        platform_stats[platform]["total_analyses"] += 1
-        platform_stats[platform]["total_comments"] += entry["stats"]["total_comments"]
-
-        for sentiment, count in entry["stats"]["sentiment"].items():
-            platform_stats[platform][f"sentiment_{sentiment}"] += count
-
-        for emotion, count in entry["stats"]["emotion"].items():
-            platform_stats[platform][f"emotion_{emotion}"] += count
-
+async def get_platform_stats(window: Optional[str] = None):
+    # All-time stats by default, or a rolling "hour", "day" or "week" window
+    if window is not None and window not in PlatformAggregates.WINDOWS:
+        raise HTTPException(status_code=400, detail="Invalid window")
+
+    # Folding in new analyses reads SQLite, so it runs off the event loop
+    reddit, youtube = await asyncio.gather(
+        asyncio.to_thread(platform_aggregates.stats, "reddit", window),
+        asyncio.to_thread(platform_aggregates.stats, "youtube", window)
+    )
     return {
-        "reddit": calculate_percentages(platform_stats["reddit"]),
-        "youtube": calculate_percentages(platform_stats["youtube"])
+        "reddit": calculate_percentages(reddit),
+        "youtube": calculate_percentages(youtube)
     }
 
-@app.get("/latest-comments")
-async def get_latest_comments():
-    try:
-        youtube_comments = get_youtube_comments("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
-        reddit_comments = get_reddit_comments("https://www.reddit.com/r/Python/comments/")
-
-        all_comments = []
-
-        for comment in youtube_comments[:5]:
-            sentiment_result = sentiment_pipeline(comment.get("text", ""))[0]
-            sentiment = sentiment_map.get(sentiment_result["label"], "Neutral")
-
-            all_comments.append({
-                "user": comment.get("author", "Anonymous"),
-                "content": comment.get("text", ""),
-                "sentiment": sentiment.lower(),
-                "time": comment.get("publishedAt", "Just now"),
-                "platform": "YouTube"
-            })
+async def _build_latest_comments():
+    # Both fetchers return plain comment texts, so there is no author or post time to show
+    youtube_comments, reddit_comments = await asyncio.gather(
+        fetch_pool.run(get_youtube_comments, LATEST_YOUTUBE_URL, LATEST_COMMENTS_PER_PLATFORM),
+        fetch_pool.run(get_reddit_comments, LATEST_REDDIT_URL, LATEST_COMMENTS_PER_PLATFORM)
+    )
+    youtube_comments = youtube_comments[:LATEST_COMMENTS_PER_PLATFORM]
+    reddit_comments = reddit_comments[:LATEST_COMMENTS_PER_PLATFORM]
+
+    sentiments = []
+    if youtube_comments or reddit_comments:
+        sentiments = await inference_pool.run(predict_sentiment_labels, youtube_comments + reddit_comments)
+
+    fetched_at = datetime.utcnow().isoformat()
+    platforms = ["YouTube"] * len(youtube_comments) + ["Reddit"] * len(reddit_comments)
+    return [
+        {
+            "user": "Anonymous",
+            "content": text,
+            "sentiment": sentiment.lower(),
+            "time": fetched_at,
+            "platform": platform
+        }
+        for text, sentiment, platform in zip(youtube_comments + reddit_comments, sentiments, platforms)
+    ]
 
-        for comment in reddit_comments[:5]:
-            sentiment_result = sentiment_pipeline(comment.get("body", ""))[0]
-            sentiment = sentiment_map.get(sentiment_result["label"], "Neutral")
+# Fetched and scored in the background; /latest-comments only reads the snapshot
+latest_comments = SnapshotRefresher(
+    "latest comments", _build_latest_comments,
+    interval=LATEST_REFRESH_INTERVAL, max_age=LATEST_MAX_AGE
+)
 
-            all_comments.append({
-                "user": comment.get("author", "Anonymous"),
-                "content": comment.get("body", ""),
-                "sentiment": sentiment.lower(),
-                "time": comment.get("created_utc", "Just now"),
-                "platform": "Reddit"
-            })
+@app.get("/latest-comments")
+async def get_latest_comments():
+    comments = await latest_comments.get(wait=LATEST_FIRST_WAIT)
+
+    if comments is None:
+        comments = [{
+            "user": "System",
+            "content": "Unable to fetch comments at the moment.",
+            "sentiment": "neutral",
+            "time": "Just now",
+            "platform": "System"
+        }]
+    elif not comments:
+        comments = [{
+            "user": "System",
+            "content": "No comments available at the moment.",
+            "sentiment": "neutral",
+            "time": "Just now",
+            "platform": "System"
+        }]
+
+    updated_at = latest_comments.updated_at
+    return {
+        "comments": comments,
+        "updated_at": datetime.utcfromtimestamp(updated_at).isoformat() if updated_at else None
+    }
 
-        all_comments.sort(key=lambda x: x["time"], reverse=True)
+@app.get("/health")
+async def health():
+    # Liveness only: the process is up and serving, models may still be loading
+    return {"status": "ok"}
 
-        if not all_comments:
-            all_comments = [{
-                "user": "System",
-                "content": "No comments available at the moment.",
-                "sentiment": "neutral",
-                "time": "Just now",
-                "platform": "System"
-            }]
+@app.get("/ready")
+async def ready():
+    status = model_registry.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
 
-        return {"comments": all_comments}
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text format, for this worker process only
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
 
-    except Exception as e:
-        logger.error(f"Error fetching latest comments: {str(e)}")
-        return {
-            "comments": [{
-                "user": "System",
-                "content": "Unable to fetch comments at the moment.",
-                "sentiment": "neutral",
-                "time": "Just now",
-                "platform": "System"
-            }]
-        }
+@app.get("/inference-stats")
+async def get_inference_stats():
+    return {
+        **{f"{kind}_batches": scheduler.stats() for kind, scheduler in schedulers.items()},
+        "cache": inference_cache.stats(),
+        "result_store": result_store.stats(),
+        "inference_pool_depth": inference_pool.queue_depth,
+        "fetch_pool_depth": fetch_pool.queue_depth
+    }
 
 @app.get("/top-comments")
 async def get_top_comments(platform: Optional[str] = None):
@@ -280,29 +480,21 @@ async def get_top_comments(platform: Optional[str] = None):
         }
 
 @app.get("/sentiment-trends")
-async def get_sentiment_trends():
-    try:
-        time_labels = [f"{23 - i}:00" for i in range(24)]
-
-        reddit_trend = [round(60 + random.uniform(-5, 5), 1) for _ in range(24)]
-        youtube_trend = [round(55 + random.uniform(-5, 5), 1) for _ in range(24)]
-
-        emotions = {
-            "joy": round(random.uniform(25, 45), 1),
-            "sadness": round(random.uniform(15, 35), 1),
-            "anger": round(random.uniform(10, 25), 1),
-            "fear": round(random.uniform(5, 20), 1),
-            "surprise": round(random.uniform(10, 25), 1)
-        }
-
-        total = sum(emotions.values())
-        for e in emotions:
-            emotions[e] = round((emotions[e] / total) * 100, 1)
+async def get_sentiment_trends(window: int = 24, resolution: Optional[int] = None):
+    # `window` hours ending now, in buckets of `resolution` hours (picked from the window if omitted)
+    if not 1 <= window <= TREND_HISTORY_HOURS:
+        raise HTTPException(status_code=400, detail=f"window must be between 1 and {TREND_HISTORY_HOURS} hours")
+    if resolution is not None and not 1 <= resolution <= window:
+        raise HTTPException(status_code=400, detail="resolution must be between 1 hour and the window")
 
+    try:
+        time_labels, series, emotions = await asyncio.to_thread(
+            trend_engine.trends, ["reddit", "youtube"], window, resolution
+        )
         return {
             "time_labels": time_labels,
-            "reddit_trend": reddit_trend,
-            "youtube_trend": youtube_trend,
+            "reddit_trend": series["reddit"],
+            "youtube_trend": series["youtube"],
             "emotions": emotions
         }
 
@@ -311,15 +503,65 @@ async def get_sentiment_trends():
         raise HTTPException(status_code=500, detail="Trend generation failed")
 
 # Helper functions
-def classify_confidence(score: float) -> str:
-    if score >= 0.8: return "high"
-    elif score >= 0.6: return "medium"
-    elif score >= 0.4: return "low"
-    return "very_low"
+def _job_stats(columns):
+    return {"sentiment_stats": columns.percentages("sentiment"), "emotion_stats": columns.percentages("emotion")}
+
+# Batch jobs fetch with their own bounded concurrency and score through the inference pool
+job_runner = JobRunner(
+    job_store,
+    fetchers={"youtube": get_youtube_comments, "reddit": get_reddit_comments},
+    analyze=lambda comments: inference_pool.submit(analyze_comments, comments),
+    record=lambda platform, url, results, columns: _record_analysis(platform, url, results, columns),
+    summarize=_job_stats
+)
 
-def normalize_stats(stats: Dict[str, int], total: int) -> Dict[str, float]:
-    if total == 0: return {k: 0.0 for k in stats}
-    return {k: round((v / total) * 100, 1) for k, v in stats.items()}
+def _next_batch(comment_iter, size):
+    return list(itertools.islice(comment_iter, size))
+
+def _record_analysis(platform, user_input, results, columns):
+    analysis_entry = {
+        "platform": platform,
+        "url": user_input,
+        "timestamp": datetime.utcnow().isoformat(),
+        "stats": {
+            "total_comments": len(results),
+            "sentiment": columns.counts("sentiment"),
+            "emotion": columns.counts("emotion")
+        }
+    }
+    analysis_id = analysis_store.append(analysis_entry)
+    result_store.put(analysis_id, results, columns)
+    platform_aggregates.refresh()
+    return analysis_entry, analysis_id
+
+def _summarize_results(results, columns):
+    # Aggregates come from the label/score columns; only the samples become dicts
+    sample_comments = []
+    for item in results[:SAMPLE_COMMENTS]:
+        sample_comments.append({
+            "text": item.text,
+            "sentiment": {
+                "label": item.sentiment.label.lower(),
+                "score": item.sentiment.score,
+                "confidence": classify_confidence(item.sentiment.score)
+            },
+            "emotion": {
+                "label": item.emotion.label.lower(),
+                "score": item.emotion.score,
+                "confidence": classify_confidence(item.emotion.score)
+            }
+        })
+
+    return {
+        "comments_analyzed": len(results),
+        "sentiment_stats": columns.percentages("sentiment"),
+        "emotion_stats": columns.percentages("emotion"),
+        "confidence_counts": {dimension: columns.confidence(dimension) for dimension in ("sentiment", "emotion")},
+        "sample_comments": sample_comments
+    }
+
+def classify_confidence(score: float) -> str:
+    return CONFIDENCE_LABELS[bisect.bisect_right(CONFIDENCE_BOUNDS, score)]
 
 def calculate_percentages(stats: Counter) -> Dict[str, float]:
     result = {}
@@ -333,10 +575,46 @@ def calculate_percentages(stats: Counter) -> Dict[str, float]:
             result[k] = v
     return result
 
+async def _warm_aggregates():
+    # The first refresh reads the whole stored history; do it before anyone asks
+    for aggregate in (platform_aggregates, trend_engine):
+        try:
+            await asyncio.to_thread(aggregate.refresh)
+        except Exception as e:
+            logger.error(f"Loading {type(aggregate).__name__} from the analysis store failed: {str(e)}")
+
+async def _maintain_analysis_store():
+    # Retention and compaction for stored analyses, off the event loop
+    while True:
+        try:
+            await asyncio.to_thread(analysis_store.maintain)
+        except Exception as e:
+            logger.error(f"Analysis store maintenance failed: {str(e)}")
+        await asyncio.sleep(ANALYSIS_MAINTENANCE_INTERVAL)
+
 @app.on_event("startup")
 async def startup_event():
+    if MODEL_LOADING == "background":
+        model_registry.start_background_load()
+    app.state.maintenance_task = asyncio.create_task(_maintain_analysis_store())
+    app.state.warm_task = asyncio.create_task(_warm_aggregates())
+    latest_comments.start()
+    job_runner.start()
     logger.info("Sentiment analysis API started")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    inference_pool.shutdown()
+    fetch_pool.shutdown()
+    for scheduler in schedulers.values():
+        scheduler.stop()
+    inference_cache.close()
+    app.state.maintenance_task.cancel()
+    latest_comments.stop()
+    job_runner.stop()
+    job_store.close()
+    analysis_store.close()
     logger.info("Sentiment analysis API stopped")
+
+# ✅ Mount the frontend directory last so it does not shadow the API routes
+app.mount("/", StaticFiles(directory="frontend", html=True), name="static")
@@ -0,0 +1,133 @@
+import contextvars
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Submission priorities; pending texts are batched lowest number first
+INTERACTIVE = 0
+BACKGROUND = 1
+# Priority for texts submitted from the current context; batch jobs run under BACKGROUND
+submit_priority = contextvars.ContextVar("submit_priority", default=INTERACTIVE)
+
+# Queued after everything else, so stop() lets pending texts finish first
+_STOP = (float("inf"), 0, None, None, 0.0)
+
+
+class BatchScheduler:
+    """Collects texts from all in-flight requests into shared model batches.
+
+    Callers submit texts and get one Future per text. A single worker thread
+    takes the oldest pending text, keeps pulling more until the batch is full
+    or `max_wait_ms` has passed since that text arrived, runs `predict_fn`
+    once on the whole batch and resolves each Future with its own result.
+
+    Pending texts are taken in `submit_priority` order, then oldest first, so
+    an interactive request only waits for the batch already running, not
+    for a batch job's backlog.
+    """
+
+    def __init__(self, name, predict_fn, max_batch_size=32, max_wait_ms=10):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count(1)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name=f"{self.name}-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, texts, priority=None):
+        self._ensure_started()
+        priority = submit_priority.get() if priority is None else priority
+        futures = []
+        now = time.monotonic()
+        for text in texts:
+            future = Future()
+            self._queue.put((priority, next(self._sequence), text, future, now))
+            futures.append(future)
+        return futures
+
+    def predict(self, texts, timeout=None):
+        """Blocking helper: submit texts and wait for all of their results."""
+        return [future.result(timeout) for future in self.submit(texts)]
+
+    def _collect(self):
+        first = self._queue.get()
+        if first[3] is None:
+            return None
+        batch = [first]
+        deadline = first[4] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[3] is None:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            started = time.monotonic()
+            texts = [text for _, _, text, _, _ in batch]
+            try:
+                predictions = self.predict_fn(texts)
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed: {str(e)}")
+                for _, _, _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, _, _, future, _), prediction in zip(batch, predictions):
+                future.set_result(prediction)
+
+            waits = [started - enqueued for _, _, _, _, enqueued in batch]
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._total_wait += sum(waits)
+                self._max_wait_seen = max(self._max_wait_seen, max(waits))
+
+    def stats(self):
+        with self._stats_lock:
+            batches, items = self._batches, self._items
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": batches,
+                "items": items,
+                "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+                "batch_fill_ratio": round(items / (batches * self.max_batch_size), 3) if batches else 0.0,
+                "avg_wait_ms": round(self._total_wait / items * 1000, 2) if items else 0.0,
+                "max_wait_ms": round(self._max_wait_seen * 1000, 2)
+            }
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
@@ -0,0 +1,115 @@
+"""Collapse duplicate comments so each distinct text is scored once.
+
+DEDUP_MODE picks how aggressively texts are grouped:
+
+    "exact":      identical model inputs share one prediction (always safe)
+    "normalized": also texts equal after casefolding, whitespace and
+                  repeated-character squeezing ("FIRST!!!" == "first!!")
+    "minhash":    also near-duplicates whose word shingles overlap by at
+                  least DEDUP_JACCARD, e.g. copy-paste spam with a word changed
+
+Only model predictions are shared; override rules still run on every
+original comment, and every comment keeps its own result.
+"""
+import hashlib
+import os
+import re
+
+import numpy as np
+
+DEDUP_MODE = os.getenv("DEDUP_MODE", "exact").lower()
+# Estimated Jaccard similarity of word shingles for two texts to count as one
+DEDUP_JACCARD = float(os.getenv("DEDUP_JACCARD", "0.7"))
+# Shorter texts only match after normalization; a few words are too few
+# shingles to estimate similarity from
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", "4"))
+
+# 64 MinHash permutations split into 16 LSH bands of 4 rows: texts at the
+# default threshold become candidates with probability ~0.99
+_PERMUTATIONS = 64
+_BANDS = 16
+_PRIME = np.uint64((1 << 32) + 15)
+_rng = np.random.default_rng(0)
+_A = _rng.integers(1, 1 << 31, _PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, _PERMUTATIONS, dtype=np.uint64)
+
+_REPEATS = re.compile(r"(.)\1{2,}")
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    text = _SPACE.sub(" ", text.casefold()).strip()
+    return _REPEATS.sub(r"\1\1", text)
+
+
+def minhash(words):
+    """MinHash signature of a text's word unigrams and bigrams."""
+    shingles = set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    # (a * x + b) mod p stays below 2**64 for 32-bit x and 31-bit a, b
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+class _MinHashIndex:
+    """LSH over MinHash signatures: only texts sharing a band are compared."""
+
+    def __init__(self, threshold, capacity):
+        self.matches_needed = threshold * _PERMUTATIONS
+        self._rows = _PERMUTATIONS // _BANDS
+        self._buckets = {}
+        self._signatures = np.empty((capacity, _PERMUTATIONS), dtype=np.uint64)
+        self._values = []
+
+    def _keys(self, signature):
+        return [(band, signature[band * self._rows:(band + 1) * self._rows].tobytes()) for band in range(_BANDS)]
+
+    def find(self, signature):
+        candidates = set()
+        for key in self._keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        if not candidates:
+            return None
+        candidates = np.fromiter(sorted(candidates), dtype=np.intp, count=len(candidates))
+        matches = np.count_nonzero(self._signatures[candidates] == signature, axis=1)
+        close = np.flatnonzero(matches >= self.matches_needed)
+        return self._values[candidates[close[0]]] if len(close) else None
+
+    def add(self, signature, value):
+        position = len(self._values)
+        self._signatures[position] = signature
+        self._values.append(value)
+        for key in self._keys(signature):
+            self._buckets.setdefault(key, []).append(position)
+
+
+def deduplicate(texts, mode=None):
+    """Return (unique_texts, owners) with texts[i] represented by unique_texts[owners[i]].
+
+    The first occurrence of each group is its representative.
+    """
+    mode = mode or DEDUP_MODE
+    unique, owners = [], []
+    seen = {}
+    index = _MinHashIndex(DEDUP_JACCARD, len(texts)) if mode == "minhash" else None
+
+    for text in texts:
+        key = text if mode == "exact" else normalize(text)
+        owner = seen.get(key)
+        signature = None
+        if owner is None and index is not None:
+            words = _WORD.findall(key)
+            if len(words) >= DEDUP_MIN_WORDS:
+                signature = minhash(words)
+                owner = index.find(signature)
+        if owner is None:
+            owner = len(unique)
+            unique.append(text)
+            if signature is not None:
+                index.add(signature, owner)
+        seen[key] = owner
+        owners.append(owner)
+    return unique, owners
@@ -1,34 +1,169 @@
 # fetch_reddit.py
 import praw
 import random  # Add this import
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from prawcore import PrawcoreException
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENT_ID"),
-    client_secret=os.getenv("REDDIT_SECRET"),
-    user_agent=os.getenv("REDDIT_USER_AGENT")
-)
-def get_reddit_comments(post_url, max_comments=200):
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+def _get_client():
+    # One praw.Reddit (and HTTP session) per thread, reused across requests;
+    # PRAW is not thread safe
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = praw.Reddit(
+            client_id=os.getenv("REDDIT_CLIENT_ID"),
+            client_secret=os.getenv("REDDIT_SECRET"),
+            user_agent=os.getenv("REDDIT_USER_AGENT")
+        )
+        _local.client = client
+    return client
+
+# Collapsed "load more comments" subtrees are expanded in parallel, within a
+# per-submission budget of extra requests and seconds
+REDDIT_MORE_REQUESTS = int(os.getenv("REDDIT_MORE_REQUESTS", "8"))
+REDDIT_TIME_BUDGET = float(os.getenv("REDDIT_TIME_BUDGET", "10"))
+REDDIT_EXPAND_WORKERS = int(os.getenv("REDDIT_EXPAND_WORKERS", "4"))
+REDDIT_REQUESTS_PER_MINUTE = float(os.getenv("REDDIT_REQUESTS_PER_MINUTE", "100"))
+
+class RedditRateLimited(Exception):
+    """Raised when no request slot frees up within the fetch's time budget."""
+
+class RateLimiter:
+    """Token bucket shared by every thread that talks to Reddit."""
+
+    def __init__(self, per_minute, burst=5):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """Wait for a request slot; False, without taking one, if it frees up only after `deadline`."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            delay = (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+            if deadline is not None and now + delay > deadline:
+                return False
+            # Going negative reserves the next free slot for this caller
+            self.tokens -= 1
+        if delay:
+            time.sleep(delay)
+        return True
+
+_rate_limiter = RateLimiter(REDDIT_REQUESTS_PER_MINUTE)
+_expander = ThreadPoolExecutor(max_workers=REDDIT_EXPAND_WORKERS, thread_name_prefix="reddit-more")
+
+def _is_more(node):
+    # MoreComments placeholders have no body; loaded comments always do
+    return not hasattr(node, "body")
+
+def _expand(more, client, deadline):
+    if not _rate_limiter.acquire(deadline):
+        return []
+    if client is None:
+        # The placeholder came from another thread's client; fetch through this thread's own
+        more._reddit = _get_client()
+    return list(more.comments(update=True))
+
+def iter_comment_bodies(post_url, more_requests=None, time_budget=None, client=None):
+    """Yield comment bodies as the comment tree is loaded.
+
+    Loaded comments are yielded first, then collapsed subtrees are expanded
+    (largest first) on a small thread pool. Expansion stops after
+    `more_requests` extra requests or `time_budget` seconds; waiting for the
+    rate limiter counts against the budget too.
+    """
+    more_requests = REDDIT_MORE_REQUESTS if more_requests is None else more_requests
+    time_budget = REDDIT_TIME_BUDGET if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+
+    if not _rate_limiter.acquire(deadline):
+        raise RedditRateLimited(f"No Reddit request slot within {time_budget}s")
+    submission = (client or _get_client()).submission(url=post_url)
+
+    more_queue = []  # (-count, tiebreak, MoreComments)
+    in_flight = set()
+
+    def walk(nodes):
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if _is_more(node):
+                heapq.heappush(more_queue, (-getattr(node, "count", 0), id(node), node))
+                continue
+            stack.extend(node.replies)
+            if node.body:
+                yield node.body
+
     try:
-        submission = reddit.submission(url=post_url)
-        submission.comments.replace_more(limit=0)  # Avoid nested comments
-        
-        # Collect all valid comments
-        all_comments = [comment.body for comment in submission.comments.list() if comment.body]
-        
+        yield from walk(submission.comments)
+
+        while more_queue or in_flight:
+            while more_queue and more_requests > 0 and len(in_flight) < REDDIT_EXPAND_WORKERS:
+                _, _, more = heapq.heappop(more_queue)
+                in_flight.add(_expander.submit(_expand, more, client, deadline))
+                more_requests -= 1
+
+            remaining = deadline - time.monotonic()
+            if not in_flight or remaining <= 0:
+                break
+
+            done, in_flight = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    yield from walk(future.result())
+                except PrawcoreException as e:
+                    logger.warning(f"Reddit API error expanding comments: {str(e)}")
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+def get_reddit_comments(post_url, max_comments=200, more_requests=None, time_budget=None, client=None):
+    try:
+        # Reservoir-sample while walking so the full comment list is never built
+        sample = []
+        seen = 0
+        for body in iter_comment_bodies(post_url, more_requests, time_budget, client):
+            seen += 1
+            if len(sample) < max_comments:
+                sample.append(body)
+            else:
+                slot = random.randrange(seen)
+                if slot < max_comments:
+                    sample[slot] = body
+
         # Shuffle comments to randomize
-        random.shuffle(all_comments)
-        
-        # Return up to 200 comments (or all if fewer exist)
-        return all_comments[:max_comments]
+        random.shuffle(sample)
+        return sample
     
     except PrawcoreException as e:
-        print(f"Reddit API Error: {str(e)}")
+        logger.error(f"Reddit API error: {str(e)}")
         return []
     except Exception as e:
-        print(f"Unexpected Error: {str(e)}")
-        return []
\ No newline at end of file
+        logger.error(f"Unexpected error fetching Reddit comments: {str(e)}")
+        return []
+
+def iter_reddit_comments(post_url, max_comments=200, client=None):
+    """Yield up to `max_comments` comment bodies in the order they are loaded."""
+    comments = iter_comment_bodies(post_url, client=client)
+    try:
+        for count, body in enumerate(comments, 1):
+            yield body
+            if count >= max_comments:
+                return
+    finally:
+        comments.close()
@@ -1,34 +1,92 @@
 from googleapiclient.discovery import build
+from concurrent.futures import ThreadPoolExecutor
 import os
 import random
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
-def get_youtube_comments(video_url, max_comments=200):
-    video_id = video_url.split("v=")[-1].split("&")[0]
-    youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+# Pages are requested on these threads so the next page downloads while the
+# current one is being parsed
+_prefetcher = ThreadPoolExecutor(max_workers=int(os.getenv("YOUTUBE_PREFETCH_WORKERS", "4")),
+                                 thread_name_prefix="youtube-prefetch")
+_local = threading.local()
 
-    comments = []
-    next_page_token = None
+def _get_client():
+    # One client (and HTTP connection) per calling thread, reused across
+    # requests; the underlying httplib2 connection is not thread safe
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = build("youtube", "v3", developerKey=YOUTUBE_API_KEY, cache_discovery=False)
+        _local.client = client
+    return client
 
-    while len(comments) < max_comments:
-        request = youtube.commentThreads().list(
+def get_video_id(video_url):
+    return video_url.split("v=")[-1].split("&")[0]
+
+def iter_youtube_pages(video_id, max_items=None, client=None):
+    """Yield raw commentThreads pages, prefetching the next page in the background.
+
+    No further page is requested once the pages yielded so far hold
+    `max_items` comments.
+    """
+    def fetch(page_token):
+        # Runs on a prefetch thread, so it uses that thread's own client
+        return (client or _get_client()).commentThreads().list(
             part="snippet",
             videoId=video_id,
             maxResults=100,
-            pageToken=next_page_token
-        )
-        response = request.execute()
+            pageToken=page_token
+        ).execute()
 
-        for item in response["items"]:
-            comment = item["snippet"]["topLevelComment"]["snippet"]["textDisplay"]
-            comments.append(comment)
+    seen = 0
+    future = _prefetcher.submit(fetch, None)
+    while future is not None:
+        response = future.result()
+        seen += len(response["items"])
 
         next_page_token = response.get("nextPageToken")
-        if not next_page_token:
-            break
+        if next_page_token and (max_items is None or seen < max_items):
+            future = _prefetcher.submit(fetch, next_page_token)
+        else:
+            future = None
+
+        yield response
+
+def iter_youtube_comments(video_url, max_items=None, client=None):
+    """Yield top-level comment texts in API order, up to `max_items`."""
+    count = 0
+    for response in iter_youtube_pages(get_video_id(video_url), max_items, client):
+        for item in response["items"]:
+            yield item["snippet"]["topLevelComment"]["snippet"]["textDisplay"]
+            count += 1
+            if max_items is not None and count >= max_items:
+                return
+
+def get_youtube_comments(video_url, max_comments=200, scan_limit=None, client=None):
+    """Random sample of up to `max_comments` comments.
+
+    Reads whole pages until at least `max_comments` comments (or `scan_limit`,
+    if larger) have been seen, keeping a reservoir sample so memory stays at
+    `max_comments` however many comments are scanned.
+    """
+    scan_limit = max(scan_limit or 0, max_comments)
+    video_id = get_video_id(video_url)
+
+    reservoir = []
+    seen = 0
+    for response in iter_youtube_pages(video_id, scan_limit, client):
+        for item in response["items"]:
+            comment = item["snippet"]["topLevelComment"]["snippet"]["textDisplay"]
+            seen += 1
+            if len(reservoir) < max_comments:
+                reservoir.append(comment)
+            else:
+                slot = random.randrange(seen)
+                if slot < max_comments:
+                    reservoir[slot] = comment
 
-    # Randomly sample up to 200 comments
-    return random.sample(comments, min(max_comments, len(comments)))
+    random.shuffle(reservoir)
+    return reservoir
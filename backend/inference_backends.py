@@ -0,0 +1,98 @@
+import inspect
+import logging
+import os
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Per-model inference backends:
+# "torch": full fp32 PyTorch (the reference)
+# "int8":  PyTorch with dynamic int8 quantization of the Linear layers
+# "onnx":  an exported ONNX Runtime graph (see backend/model_export.py)
+BACKENDS = ("torch", "int8", "onnx")
+
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/onnx")
+
+
+def onnx_path(kind):
+    return os.path.join(ONNX_MODEL_DIR, f"{kind}.onnx")
+
+
+class TorchRunner:
+    """Runs a (possibly quantized) transformers model on a padded batch."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, batch):
+        with torch.no_grad():
+            return self.model(**batch).logits
+
+
+class OnnxRunner:
+    """Runs an exported graph with ONNX Runtime and hands logits back as a tensor."""
+
+    def __init__(self, path):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx backend needs onnxruntime: pip install onnxruntime")
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No exported model at {path}; run python -m backend.model_export export first")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, batch):
+        feeds = {name: batch[name].numpy() for name in self.input_names}
+        return torch.from_numpy(self.session.run(None, feeds)[0])
+
+
+def quantize_int8(model):
+    """Swap the Linear layers of `model` for int8 ones in place, so the fp32 weights are freed."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def build_runner(kind, model, backend):
+    """Return a batch -> logits callable for `model` on the requested backend."""
+    if backend == "torch":
+        return TorchRunner(model)
+    if backend == "int8":
+        return TorchRunner(quantize_int8(model))
+    if backend == "onnx":
+        return OnnxRunner(onnx_path(kind))
+    raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+
+
+def export_onnx(model, tokenizer, path):
+    """Export a sequence classifier with dynamic batch and sequence axes."""
+    sample = tokenizer(["export sample text", "a second, longer export sample text"],
+                       padding=True, return_tensors="pt")
+    # Graph inputs follow the order of forward()'s parameters, not the tokenizer's keys
+    input_names = [name for name in inspect.signature(model.forward).parameters if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # The TorchScript exporter handles these models without extra dependencies
+        kwargs["dynamo"] = False
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    model.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dict(sample),),
+            path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            **kwargs
+        )
+    logger.info(f"Exported ONNX model to {path}")
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def cache_key(model_id: str, text: str) -> bytes:
+    """Content address for one model prediction: hash of model identity plus model input."""
+    return hashlib.blake2b(f"{model_id}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+
+class InferenceCache:
+    """Two-tier cache of raw model predictions ({"label", "score"} dicts).
+
+    The memory tier is an LRU bounded to `max_entries`; the optional SQLite
+    tier at `db_path` is unbounded and survives restarts. Only raw model
+    outputs are cached, so override rules and thresholds still run on every
+    lookup and give the same labels as a fresh model call.
+    """
+
+    def __init__(self, max_entries=50000, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._conn()
+
+    def _conn(self):
+        # A connection must not cross a fork (backend.serve forks workers
+        # after import), so each process opens its own
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key BLOB PRIMARY KEY, label TEXT NOT NULL, score REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or self._db is not None
+
+    def get_many(self, keys):
+        """Return {key: prediction} for every key found in either tier."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                prediction = self._memory.get(key)
+                if prediction is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = prediction
+            memory_found = set(found)
+
+            missing = list({key for key in keys if key not in found})
+            if self._db is not None and missing:
+                from_disk = self._read_disk(missing)
+                for key, prediction in from_disk.items():
+                    self._remember(key, prediction)
+                found.update(from_disk)
+
+            # Count every lookup, including repeats of the same text
+            for key in keys:
+                if key in memory_found:
+                    self.memory_hits += 1
+                elif key in found:
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+        return found
+
+    def put_many(self, predictions):
+        if not predictions:
+            return
+        with self._lock:
+            for key, prediction in predictions.items():
+                self._remember(key, prediction)
+            if self._db is not None:
+                db = self._conn()
+                db.executemany(
+                    "INSERT OR REPLACE INTO predictions (key, label, score) VALUES (?, ?, ?)",
+                    [(key, p["label"], p["score"]) for key, p in predictions.items()]
+                )
+                db.commit()
+
+    def _remember(self, key, prediction):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = prediction
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, keys):
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn().execute(
+                f"SELECT key, label, score FROM predictions WHERE key IN ({placeholders})", chunk
+            )
+            for key, label, score in rows:
+                found[key] = {"label": label, "score": score}
+        return found
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "disk_tier": self._db is not None
+            }
+
+    def close(self):
+        if self._db is not None:
+            # Only close a connection this process opened
+            if self._db_pid == os.getpid():
+                self._db.close()
+            self._db = None
+
+
+# INFERENCE_CACHE_SIZE=0 turns off the memory tier; the disk tier is off unless
+# INFERENCE_CACHE_DB points at a SQLite file.
+inference_cache = InferenceCache(
+    max_entries=int(os.getenv("INFERENCE_CACHE_SIZE", "50000")),
+    db_path=os.getenv("INFERENCE_CACHE_DB") or None
+)
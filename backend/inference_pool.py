@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when a pool already has as much work as it is allowed to queue."""
+
+
+class PoolTimeout(Exception):
+    """Raised when a call does not finish within its timeout."""
+
+
+class WorkerPool:
+    """Bounded thread pool that async handlers can await without blocking the loop.
+
+    At most `max_workers` calls run at once and at most `max_pending` more
+    wait in the queue; anything beyond that is rejected with PoolSaturated so
+    the server sheds load instead of piling up requests.
+    """
+
+    def __init__(self, name, max_workers, max_pending, timeout):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._outstanding = 0
+
+    @property
+    def queue_depth(self):
+        """Calls submitted but not yet finished (running plus waiting)."""
+        return self._outstanding
+
+    def _release(self, _future):
+        with self._lock:
+            self._outstanding -= 1
+
+    def submit(self, fn, *args, **kwargs):
+        """Start `fn` on the pool and return its concurrent Future; PoolSaturated when full."""
+        with self._lock:
+            if self._outstanding >= self.max_workers + self.max_pending:
+                raise PoolSaturated(f"{self.name} pool is full")
+            self._outstanding += 1
+
+        try:
+            # Run in a copy of the caller's context, as asyncio.to_thread does
+            context = contextvars.copy_context()
+            future = self._executor.submit(context.run, functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._release(None)
+            raise
+        # Release the slot only when the thread is really done, so a timed-out
+        # call that is still running keeps counting against the limit
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} call {getattr(fn, '__name__', fn)} timed out")
+            raise PoolTimeout(f"{self.name} call timed out")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Inference workers mostly wait on the batch schedulers, which do the actual
+# model work on their own threads; fetches are network bound and fan out more.
+inference_pool = WorkerPool(
+    "inference",
+    max_workers=int(os.getenv("INFERENCE_WORKERS", "4")),
+    max_pending=int(os.getenv("INFERENCE_QUEUE_SIZE", "16")),
+    timeout=float(os.getenv("INFERENCE_TIMEOUT", "120"))
+)
+
+fetch_pool = WorkerPool(
+    "fetch",
+    max_workers=int(os.getenv("FETCH_WORKERS", "8")),
+    max_pending=int(os.getenv("FETCH_QUEUE_SIZE", "32")),
+    timeout=float(os.getenv("FETCH_TIMEOUT", "60"))
+)
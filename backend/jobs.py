@@ -0,0 +1,370 @@
+"""Batch analysis jobs: many URLs in, one analysis per URL out.
+
+Jobs and their items live in SQLite, so a restarted server picks up where
+it left off: finished items are kept, and items that were in flight when
+the previous runner died go back to pending. With several uvicorn workers
+only the one holding the runner lease processes jobs.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from backend.batch_scheduler import BACKGROUND, submit_priority
+from backend.inference_pool import PoolSaturated, PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB = os.getenv("JOBS_DB") or os.getenv("ANALYSIS_DB", "data/janvichaar.db")
+# URLs accepted per job
+JOB_MAX_ITEMS = int(os.getenv("JOB_MAX_ITEMS", "1000"))
+# Comments fetched per URL
+JOB_MAX_COMMENTS = int(os.getenv("JOB_MAX_COMMENTS", "200"))
+# Fetches in flight at once, per platform
+JOB_CONCURRENCY = {
+    "youtube": int(os.getenv("JOB_YOUTUBE_CONCURRENCY", "4")),
+    "reddit": int(os.getenv("JOB_REDDIT_CONCURRENCY", "2"))
+}
+# Comments from several URLs are scored together in batches of about this size
+JOB_INFERENCE_BATCH = int(os.getenv("JOB_INFERENCE_BATCH", "256"))
+# Seconds one job batch may take; job texts queue behind interactive ones, so
+# this is well above INFERENCE_TIMEOUT
+JOB_INFERENCE_TIMEOUT = float(os.getenv("JOB_INFERENCE_TIMEOUT", "600"))
+# Further JOB_INFERENCE_TIMEOUT periods to wait on a batch that ran over before its items fail
+JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "2"))
+# Seconds without a heartbeat after which another worker takes over the jobs
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    analysis_id INTEGER,
+    comments_analyzed INTEGER,
+    stats TEXT,
+    error TEXT,
+    updated TEXT NOT NULL,
+    PRIMARY KEY (job_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_job_items_status ON job_items (status, platform);
+CREATE TABLE IF NOT EXISTS job_runner (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    owner TEXT NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+# Item lifecycle: pending -> fetching -> analyzing -> done | failed
+IN_FLIGHT = ("fetching", "analyzing")
+
+
+def detect_platform(url):
+    host = url.lower()
+    if "youtube.com" in host or "youtu.be" in host:
+        return "youtube"
+    if "reddit.com" in host or "redd.it" in host:
+        return "reddit"
+    return None
+
+
+class JobStore:
+    """SQLite persistence for jobs, their items and the runner lease."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._claim_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create_job(self, items):
+        """items: [(platform, url), ...]; returns the new job id."""
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow().isoformat()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT INTO jobs (id, created) VALUES (?, ?)", (job_id, now))
+            conn.executemany(
+                "INSERT INTO job_items (job_id, position, platform, url, status, updated) "
+                "VALUES (?, ?, ?, ?, 'pending', ?)",
+                [(job_id, position, platform, url, now) for position, (platform, url) in enumerate(items)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def get_job(self, job_id):
+        conn = self._conn()
+        job = conn.execute("SELECT id, created FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            return None
+        rows = conn.execute(
+            "SELECT platform, url, status, analysis_id, comments_analyzed, stats, error, updated "
+            "FROM job_items WHERE job_id = ? ORDER BY position", (job_id,)
+        ).fetchall()
+
+        items = []
+        counts = {"pending": 0, "fetching": 0, "analyzing": 0, "done": 0, "failed": 0}
+        for platform, url, status, analysis_id, comments, stats, error, updated in rows:
+            counts[status] += 1
+            items.append({
+                "platform": platform,
+                "url": url,
+                "status": status,
+                "analysis_id": analysis_id,
+                "comments_analyzed": comments,
+                "stats": json.loads(stats) if stats else None,
+                "error": error,
+                "updated": updated
+            })
+
+        finished = counts["done"] + counts["failed"]
+        if finished == len(items):
+            status = "completed"
+        elif finished or counts["fetching"] or counts["analyzing"]:
+            status = "running"
+        else:
+            status = "queued"
+        return {
+            "job_id": job_id,
+            "status": status,
+            "created": job[1],
+            "total": len(items),
+            "progress": round(finished / len(items) * 100, 1) if items else 100.0,
+            "counts": counts,
+            "comments_analyzed": sum(item["comments_analyzed"] or 0 for item in items),
+            "items": items
+        }
+
+    def acquire_lease(self, owner, ttl=JOB_LEASE_SECONDS):
+        """Take or renew the runner lease; True if `owner` holds it afterwards.
+
+        A new holder puts every in-flight item back to pending, since the
+        previous holder is gone and was the only one working on them.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, heartbeat FROM job_runner WHERE id = 1").fetchone()
+            if row is not None and row[0] != owner and row[1] > now - ttl:
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "INSERT INTO job_runner (id, owner, heartbeat) VALUES (1, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET owner = excluded.owner, heartbeat = excluded.heartbeat",
+                (owner, now)
+            )
+            if row is None or row[0] != owner:
+                resumed = conn.execute(
+                    f"UPDATE job_items SET status = 'pending' WHERE status IN {IN_FLIGHT}"
+                ).rowcount
+                if resumed:
+                    logger.info(f"Resuming {resumed} interrupted job items")
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release_lease(self, owner):
+        self._conn().execute("DELETE FROM job_runner WHERE id = 1 AND owner = ?", (owner,))
+
+    def claim(self, platform):
+        """Mark the oldest pending item of a platform as fetching; (job_id, position, url) or None."""
+        with self._claim_lock:
+            return self._conn().execute(
+                "UPDATE job_items SET status = 'fetching', updated = ? WHERE rowid = ("
+                "SELECT rowid FROM job_items WHERE status = 'pending' AND platform = ? "
+                "ORDER BY rowid LIMIT 1) RETURNING job_id, position, url",
+                (datetime.utcnow().isoformat(), platform)
+            ).fetchone()
+
+    def update(self, job_id, position, status, analysis_id=None, comments=None, stats=None, error=None):
+        self._conn().execute(
+            "UPDATE job_items SET status = ?, analysis_id = ?, comments_analyzed = ?, stats = ?, "
+            "error = ?, updated = ? WHERE job_id = ? AND position = ?",
+            (status, analysis_id, comments, json.dumps(stats) if stats is not None else None,
+             error, datetime.utcnow().isoformat(), job_id, position)
+        )
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class JobRunner:
+    """Works through pending job items while this process holds the runner lease.
+
+    Per platform, JOB_CONCURRENCY fetchers claim items and download their
+    comments; one scorer drains what they fetched and runs it through
+    `analyze` in batches of about JOB_INFERENCE_BATCH comments, then hands
+    each URL's share of the results to `record`. Job texts are submitted to
+    the model batchers at BACKGROUND priority, behind interactive requests.
+    """
+
+    def __init__(self, store, fetchers, analyze, record, summarize):
+        self.store = store
+        self.fetchers = fetchers      # platform -> fn(url, max_comments) -> [comment, ...]
+        self.analyze = analyze        # fn(comments) -> concurrent Future of (results, ResultColumns)
+        self.record = record          # fn(platform, url, results, columns) -> (entry, analysis_id)
+        self.summarize = summarize    # fn(columns) -> stats stored on the item
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = ThreadPoolExecutor(max_workers=sum(JOB_CONCURRENCY.values()), thread_name_prefix="job-fetch")
+        self._fetched = asyncio.Queue(maxsize=sum(JOB_CONCURRENCY.values()) * 2)
+        self._leader = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle fetchers, e.g. right after a job was created."""
+        self._wakeup.set()
+
+    def start(self):
+        self._tasks.append(asyncio.create_task(self._hold_lease()))
+        for platform, concurrency in JOB_CONCURRENCY.items():
+            for _ in range(concurrency):
+                self._tasks.append(asyncio.create_task(self._fetch_loop(platform)))
+        self._tasks.append(asyncio.create_task(self._score_loop()))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._leader.is_set():
+            self.store.release_lease(self.owner)
+
+    async def _hold_lease(self):
+        while True:
+            try:
+                if await asyncio.to_thread(self.store.acquire_lease, self.owner):
+                    if not self._leader.is_set():
+                        logger.info("Job runner lease acquired")
+                    self._leader.set()
+                else:
+                    self._leader.clear()
+            except Exception as e:
+                logger.error(f"Job runner lease check failed: {str(e)}")
+                self._leader.clear()
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+
+    async def _fetch_loop(self, platform):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._leader.wait()
+            claimed = await asyncio.to_thread(self.store.claim, platform)
+            if claimed is None:
+                # Idle until a job is created or a short poll interval passes
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), 5)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, position, url = claimed
+            try:
+                comments = await loop.run_in_executor(
+                    self._executor, self.fetchers[platform], url, JOB_MAX_COMMENTS
+                )
+            except Exception as e:
+                logger.error(f"Job {job_id} fetch of {url} failed: {str(e)}")
+                await asyncio.to_thread(self.store.update, job_id, position, "failed", error=str(e))
+                continue
+            if not comments:
+                await asyncio.to_thread(self.store.update, job_id, position, "failed", error="No comments found")
+                continue
+
+            await asyncio.to_thread(self.store.update, job_id, position, "analyzing")
+            await self._fetched.put((job_id, position, platform, url, comments))
+
+    async def _score_loop(self):
+        # This task's context, and so every inference call it makes, is background work
+        submit_priority.set(BACKGROUND)
+        while True:
+            batch = [await self._fetched.get()]
+            size = len(batch[0][4])
+            # Top the batch up with whatever else arrives shortly
+            while size < JOB_INFERENCE_BATCH:
+                try:
+                    item = await asyncio.wait_for(self._fetched.get(), 0.5)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[4])
+
+            try:
+                results, columns = await self._analyze([c for item in batch for c in item[4]])
+            except Exception as e:
+                logger.error(f"Job batch of {len(batch)} URLs failed: {str(e)}")
+                for job_id, position, *_ in batch:
+                    await asyncio.to_thread(self.store.update, job_id, position, "failed", error=str(e))
+                continue
+
+            offset = 0
+            for job_id, position, platform, url, comments in batch:
+                rows = slice(offset, offset + len(comments))
+                offset += len(comments)
+                item_results, item_columns = results[rows], columns[rows]
+                try:
+                    _, analysis_id = await asyncio.to_thread(self.record, platform, url, item_results, item_columns)
+                    await asyncio.to_thread(
+                        self.store.update, job_id, position, "done",
+                        analysis_id=analysis_id, comments=len(item_results), stats=self.summarize(item_columns)
+                    )
+                except Exception as e:
+                    logger.error(f"Job {job_id} could not record {url}: {str(e)}")
+                    await asyncio.to_thread(self.store.update, job_id, position, "failed", error=str(e))
+
+    async def _analyze(self, comments):
+        # Interactive requests come first: back off while the inference pool is full
+        while True:
+            try:
+                future = self.analyze(comments)
+                break
+            except PoolSaturated:
+                await asyncio.sleep(1)
+
+        # A batch that runs over keeps its one pool slot and is waited on again
+        # rather than submitted a second time; after JOB_MAX_RETRIES it fails
+        waiting = asyncio.wrap_future(future)
+        for attempt in range(JOB_MAX_RETRIES + 1):
+            try:
+                return await asyncio.wait_for(asyncio.shield(waiting), JOB_INFERENCE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Job batch of {len(comments)} comments still running after "
+                               f"{(attempt + 1) * JOB_INFERENCE_TIMEOUT:.0f}s")
+        future.cancel()
+        raise PoolTimeout(f"Job batch did not finish within {(JOB_MAX_RETRIES + 1) * JOB_INFERENCE_TIMEOUT:.0f}s")
+
+
+job_store = JobStore(JOBS_DB)
@@ -0,0 +1,251 @@
+"""Offline tools for the alternative inference backends.
+
+    python -m backend.model_export export [--output-dir models/onnx]
+    python -m backend.model_export parity --corpus comments.txt [--backends int8 onnx]
+    python -m backend.model_export train-shared --corpus comments.txt [--output models/shared_heads.pt]
+    python -m backend.model_export shared-agreement --corpus comments.txt [--backend torch]
+
+`export` writes an ONNX graph per model from the locally cached weights
+(no network access). `parity` runs a corpus (one comment per line) through
+each backend and reports label agreement and latency against fp32 PyTorch.
+`train-shared` distills the emotion model into a head on the sentiment
+model's embeddings for ENCODER_MODE=shared, and `shared-agreement` compares
+that mode with the two-model path.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import torch
+
+from backend.inference_backends import ONNX_MODEL_DIR, export_onnx
+from backend.model_registry import load_model
+from backend.sentiment_model import (
+    SENTIMENT_MODEL_NAME, EMOTION_MODEL_NAME, INFERENCE_BATCH_SIZE, MAX_SEQ_LENGTH,
+    sentiment_map, emotion_map, rule_engine, _predict_batched, _build_result
+)
+from backend.shared_encoder import SHARED_HEADS_PATH, encode, load_shared_encoder
+from backend.text_prep import clean_text, model_text
+
+MODELS = {
+    "sentiment": (SENTIMENT_MODEL_NAME, sentiment_map),
+    "emotion": (EMOTION_MODEL_NAME, emotion_map)
+}
+
+
+def export(kinds, output_dir):
+    for kind in kinds:
+        name, _ = MODELS[kind]
+        loaded = load_model(kind, name, "torch", local_files_only=True)
+        export_onnx(loaded.model, loaded.tokenizer, os.path.join(output_dir, f"{kind}.onnx"))
+        print(f"Exported {kind} ({name}) to {output_dir}")
+
+
+def _timed_predictions(loaded, texts, batch_size):
+    started = time.perf_counter()
+    predictions = _predict_batched(loaded, texts, batch_size, MAX_SEQ_LENGTH)
+    return predictions, time.perf_counter() - started
+
+
+def parity(kinds, backends, texts, batch_size):
+    report = {"comments": len(texts), "batch_size": batch_size, "models": {}}
+
+    for kind in kinds:
+        name, label_map = MODELS[kind]
+        baseline = load_model(kind, name, "torch", local_files_only=True)
+        base_predictions, base_seconds = _timed_predictions(baseline, texts, batch_size)
+        results = {"torch": {"ms_per_comment": round(base_seconds / len(texts) * 1000, 3)}}
+
+        for backend in backends:
+            loaded = load_model(kind, name, backend, local_files_only=True)
+            predictions, seconds = _timed_predictions(loaded, texts, batch_size)
+            pairs = list(zip(base_predictions, predictions))
+            results[backend] = {
+                # Raw model labels ("4 stars") and the app's labels ("Positive")
+                "label_agreement": round(sum(a["label"] == b["label"] for a, b in pairs) / len(pairs), 4),
+                "mapped_label_agreement": round(sum(
+                    label_map.get(a["label"]) == label_map.get(b["label"]) for a, b in pairs
+                ) / len(pairs), 4),
+                "mean_score_diff": round(sum(abs(a["score"] - b["score"]) for a, b in pairs) / len(pairs), 5),
+                "ms_per_comment": round(seconds / len(texts) * 1000, 3),
+                "speedup": round(base_seconds / seconds, 2) if seconds else None,
+                "load_seconds": round(loaded.load_seconds, 2)
+            }
+
+        report["models"][kind] = results
+
+    return report
+
+
+def _teacher_outputs(backbone, teacher, texts, batch_size):
+    """Backbone embeddings and emotion model probabilities for each text (first window only)."""
+    embeddings, targets = [], []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        with torch.no_grad():
+            for loaded, out in ((backbone, embeddings), (teacher, targets)):
+                max_length = min(MAX_SEQ_LENGTH, loaded.tokenizer.model_max_length)
+                batch = loaded.tokenizer(chunk, truncation=True, max_length=max_length,
+                                         padding=True, return_tensors="pt")
+                if loaded is backbone:
+                    out.append(encode(loaded.model, batch)[1])
+                else:
+                    out.append(loaded.model(**batch).logits.softmax(dim=-1))
+    return torch.cat(embeddings), torch.cat(targets)
+
+
+def train_shared(texts, output, epochs, batch_size, validation, seed=0):
+    """Fit a linear emotion head on backbone embeddings to the emotion model's probabilities."""
+    texts = [model_text(clean_text(text)) for text in texts]
+    backbone = load_model("sentiment", SENTIMENT_MODEL_NAME, "torch", local_files_only=True)
+    teacher = load_model("emotion", EMOTION_MODEL_NAME, "torch", local_files_only=True)
+
+    started = time.perf_counter()
+    embeddings, targets = _teacher_outputs(backbone, teacher, texts, batch_size)
+    encode_seconds = time.perf_counter() - started
+
+    generator = torch.Generator().manual_seed(seed)
+    order = torch.randperm(len(texts), generator=generator)
+    held_out = int(len(texts) * validation)
+    valid, train = order[:held_out], order[held_out:]
+
+    # Standardize for training, then fold the scaling back into the layer
+    mean = embeddings[train].mean(dim=0)
+    std = embeddings[train].std(dim=0).clamp(min=1e-6)
+    features = (embeddings - mean) / std
+
+    head = torch.nn.Linear(embeddings.shape[1], targets.shape[1])
+    optimizer = torch.optim.AdamW(head.parameters(), lr=1e-2, weight_decay=1e-3)
+    for _ in range(epochs):
+        for step in train[torch.randperm(len(train), generator=generator)].split(256):
+            # Cross-entropy against the teacher's full distribution, not just its top label
+            loss = -(targets[step] * head(features[step]).log_softmax(dim=-1)).sum(dim=-1).mean()
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+    with torch.no_grad():
+        weight = head.weight / std
+        bias = head.bias - weight @ mean
+        predicted = (embeddings @ weight.T + bias).argmax(dim=-1)
+    teacher_labels = targets.argmax(dim=-1)
+
+    def agreement(rows):
+        return round((predicted[rows] == teacher_labels[rows]).float().mean().item(), 4) if len(rows) else None
+
+    report = {
+        "comments": len(texts),
+        "train_agreement": agreement(train),
+        "validation_agreement": agreement(valid),
+        "encode_seconds": round(encode_seconds, 1)
+    }
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    torch.save({
+        "backbone": SENTIMENT_MODEL_NAME,
+        "teacher": EMOTION_MODEL_NAME,
+        "id2label": dict(teacher.id2label),
+        "weight": weight.contiguous(),
+        "bias": bias.contiguous(),
+        "trained": datetime.utcnow().isoformat(),
+        **report
+    }, output)
+    return report
+
+
+def shared_agreement(texts, backend, heads_path, batch_size):
+    """Raw, mapped and final (rules and thresholds applied) label agreement of the shared encoder."""
+    texts = [model_text(clean_text(text)) for text in texts]
+    sentiment = load_model("sentiment", SENTIMENT_MODEL_NAME, "torch", local_files_only=True)
+    emotion = load_model("emotion", EMOTION_MODEL_NAME, "torch", local_files_only=True)
+    shared = load_shared_encoder("shared", SENTIMENT_MODEL_NAME, backend, local_files_only=True, heads_path=heads_path)
+
+    started = time.perf_counter()
+    separate = list(zip(_predict_batched(sentiment, texts, batch_size, MAX_SEQ_LENGTH),
+                        _predict_batched(emotion, texts, batch_size, MAX_SEQ_LENGTH)))
+    separate_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    combined = _predict_batched(shared, texts, batch_size, MAX_SEQ_LENGTH)
+    shared_seconds = time.perf_counter() - started
+
+    rules = rule_engine.current()
+    overrides = [rules.match(text) for text in texts]
+    report = {"comments": len(texts), "backend": backend, "heads": {}}
+    for head, (kind, label_map) in enumerate((("sentiment", sentiment_map), ("emotion", emotion_map))):
+        pairs = [(a[head], b[head]) for a, b in zip(separate, combined)]
+        final = [
+            (getattr(_build_result(text, *a, override), kind).label,
+             getattr(_build_result(text, *b, override), kind).label)
+            for text, a, b, override in zip(texts, separate, combined, overrides)
+        ]
+        report["heads"][kind] = {
+            "label_agreement": round(sum(a["label"] == b["label"] for a, b in pairs) / len(pairs), 4),
+            "mapped_label_agreement": round(sum(
+                label_map.get(a["label"]) == label_map.get(b["label"]) for a, b in pairs
+            ) / len(pairs), 4),
+            "final_label_agreement": round(sum(a == b for a, b in final) / len(final), 4),
+            "mean_score_diff": round(sum(abs(a["score"] - b["score"]) for a, b in pairs) / len(pairs), 5)
+        }
+    report["separate_ms_per_comment"] = round(separate_seconds / len(texts) * 1000, 3)
+    report["shared_ms_per_comment"] = round(shared_seconds / len(texts) * 1000, 3)
+    report["speedup"] = round(separate_seconds / shared_seconds, 2) if shared_seconds else None
+    return report
+
+
+def _read_corpus(parser, path, limit):
+    with open(path, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()][:limit]
+    if not texts:
+        parser.error(f"No comments found in {path}")
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and check alternative inference backends")
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=list(MODELS))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Export ONNX graphs from locally cached weights")
+    export_parser.add_argument("--output-dir", default=ONNX_MODEL_DIR)
+
+    parity_parser = sub.add_parser("parity", help="Compare backends against fp32 PyTorch")
+    parity_parser.add_argument("--corpus", required=True, help="Text file with one comment per line")
+    parity_parser.add_argument("--backends", nargs="+", choices=["int8", "onnx"], default=["int8", "onnx"])
+    parity_parser.add_argument("--batch-size", type=int, default=INFERENCE_BATCH_SIZE)
+    parity_parser.add_argument("--limit", type=int, default=1000)
+
+    train_parser = sub.add_parser("train-shared", help="Distill the emotion head for ENCODER_MODE=shared")
+    train_parser.add_argument("--corpus", required=True, help="Text file with one comment per line")
+    train_parser.add_argument("--output", default=SHARED_HEADS_PATH)
+    train_parser.add_argument("--epochs", type=int, default=30)
+    train_parser.add_argument("--validation", type=float, default=0.1, help="Share of the corpus held out")
+    train_parser.add_argument("--batch-size", type=int, default=INFERENCE_BATCH_SIZE)
+    train_parser.add_argument("--limit", type=int, default=20000)
+
+    agreement_parser = sub.add_parser("shared-agreement", help="Compare ENCODER_MODE=shared with the two models")
+    agreement_parser.add_argument("--corpus", required=True, help="Text file with one comment per line")
+    agreement_parser.add_argument("--heads", default=SHARED_HEADS_PATH)
+    agreement_parser.add_argument("--backend", choices=["torch", "int8"], default="torch")
+    agreement_parser.add_argument("--batch-size", type=int, default=INFERENCE_BATCH_SIZE)
+    agreement_parser.add_argument("--limit", type=int, default=1000)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export(args.models, args.output_dir)
+    elif args.command == "parity":
+        texts = _read_corpus(parser, args.corpus, args.limit)
+        print(json.dumps(parity(args.models, args.backends, texts, args.batch_size), indent=2))
+    elif args.command == "train-shared":
+        texts = _read_corpus(parser, args.corpus, args.limit)
+        report = train_shared(texts, args.output, args.epochs, args.batch_size, args.validation)
+        print(json.dumps(report, indent=2))
+        print(f"Saved shared encoder heads to {args.output}")
+    else:
+        texts = _read_corpus(parser, args.corpus, args.limit)
+        print(json.dumps(shared_agreement(texts, args.backend, args.heads, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import gc
+import logging
+import os
+import threading
+import time
+
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+from backend.inference_backends import build_runner, onnx_path
+
+logger = logging.getLogger(__name__)
+
+# "background": start loading when the app starts and serve /ready once done
+# "lazy": load each model on first use
+# "eager": load at import time, e.g. in a pre-fork master so workers share weights
+MODEL_LOADING = os.getenv("MODEL_LOADING", "background").lower()
+
+
+class LoadedModel:
+    def __init__(self, name, backend, runner, tokenizer, id2label, model=None, load_seconds=0.0):
+        self.name = name
+        self.backend = backend
+        self.runner = runner
+        self.tokenizer = tokenizer
+        self.id2label = id2label
+        self.model = model
+        self.load_seconds = load_seconds
+
+
+def load_model(kind, name, backend="torch", local_files_only=False) -> LoadedModel:
+    """Load tokenizer and weights for one classifier and wrap them in a backend runner."""
+    started = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(name, local_files_only=local_files_only)
+    if backend == "onnx":
+        # The graph carries the weights; only the label names are needed here
+        model = None
+        id2label = AutoConfig.from_pretrained(name, local_files_only=local_files_only).id2label
+        runner = build_runner(kind, None, backend)
+    else:
+        model = AutoModelForSequenceClassification.from_pretrained(name, local_files_only=local_files_only)
+        model.eval()
+        id2label = model.config.id2label
+        runner = build_runner(kind, model, backend)
+        # The model the runner actually uses; int8 quantizes in place, so no fp32 copy is kept
+        model = runner.model
+    return LoadedModel(name, backend, runner, tokenizer, id2label, model, time.perf_counter() - started)
+
+
+class ModelRegistry:
+    """Owns the classifier models and loads each one exactly once.
+
+    Models are registered by kind ("sentiment", "emotion") with an inference
+    backend from inference_backends.BACKENDS, and loaded on first
+    `get`, by `start_background_load`, or up front by `preload`. Callers that
+    ask for a model while it is loading simply wait for it.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._loaders = {}
+        self._loaded = {}
+        self._locks = {}
+        self._errors = {}
+        self._background = None
+
+    def register(self, kind, model_name, backend="torch", loader=load_model):
+        """`loader(kind, name, backend)` returns the LoadedModel; load_model for plain classifiers."""
+        self._specs[kind] = (model_name, backend)
+        self._loaders[kind] = loader
+        self._locks[kind] = threading.Lock()
+
+    def identity(self, kind):
+        """Model name plus backend: what a prediction for `kind` depends on."""
+        name, backend = self._specs[kind]
+        return f"{name}:{backend}"
+
+    def get(self, kind) -> LoadedModel:
+        loaded = self._loaded.get(kind)
+        if loaded is not None:
+            return loaded
+
+        with self._locks[kind]:
+            if kind not in self._loaded:
+                self._loaded[kind] = self._load(kind)
+        return self._loaded[kind]
+
+    def _load(self, kind):
+        name, backend = self._specs[kind]
+        logger.info(f"Loading {kind} model {name} ({backend} backend)")
+        try:
+            loaded = self._loaders[kind](kind, name, backend)
+        except Exception as e:
+            self._errors[kind] = str(e)
+            raise
+        self._errors.pop(kind, None)
+        logger.info(f"Loaded {kind} model in {loaded.load_seconds:.1f}s")
+        return loaded
+
+    def load_all(self):
+        for kind in self._specs:
+            try:
+                self.get(kind)
+            except Exception as e:
+                logger.error(f"Failed to load {kind} model: {str(e)}")
+
+    def start_background_load(self):
+        if self._background is None:
+            self._background = threading.Thread(target=self.load_all, name="model-loader", daemon=True)
+            self._background.start()
+
+    def preload(self):
+        """Load everything now and freeze the heap so forked workers share it copy-on-write."""
+        self.load_all()
+        # Keep the garbage collector from touching (and so copying) the
+        # pre-fork objects in every worker
+        gc.freeze()
+
+    def memory_bytes(self):
+        """Approximate weight memory per loaded model: tensors for torch backends, graph size for onnx."""
+        sizes = {}
+        for kind, loaded in list(self._loaded.items()):
+            if loaded.backend == "onnx":
+                sizes[kind] = os.path.getsize(onnx_path(kind))
+                continue
+            total = 0
+            for value in loaded.runner.model.state_dict().values():
+                # Quantized Linear layers keep packed (weight, bias) tuples
+                for tensor in value if isinstance(value, tuple) else (value,):
+                    if hasattr(tensor, "element_size"):
+                        total += tensor.element_size() * tensor.nelement()
+            sizes[kind] = total
+        return sizes
+
+    def is_ready(self):
+        return all(kind in self._loaded for kind in self._specs)
+
+    def status(self):
+        models = {}
+        for kind, (name, backend) in self._specs.items():
+            if kind in self._loaded:
+                models[kind] = {"name": name, "backend": backend, "state": "ready",
+                                "load_seconds": round(self._loaded[kind].load_seconds, 2)}
+            elif kind in self._errors:
+                models[kind] = {"name": name, "backend": backend, "state": "failed",
+                                "error": self._errors[kind]}
+            else:
+                models[kind] = {"name": name, "backend": backend, "state": "pending"}
+        return {"ready": self.is_ready(), "models": models}
+
+
+model_registry = ModelRegistry()
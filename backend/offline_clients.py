@@ -0,0 +1,163 @@
+"""Offline stand-ins for the YouTube and Reddit APIs.
+
+They replay recorded (or synthetic) responses through the same interface
+the real clients expose, so the fetchers, benchmarks and local debugging
+can run without network access or API keys.
+"""
+import json
+import threading
+import time
+
+
+def youtube_pages_from_comments(comments, page_size=100):
+    """Build commentThreads pages in the API's response shape from plain texts."""
+    pages = []
+    for start in range(0, len(comments), page_size):
+        pages.append({"items": [
+            {"snippet": {"topLevelComment": {"snippet": {"textDisplay": text}}}}
+            for text in comments[start:start + page_size]
+        ]})
+    return pages or [{"items": []}]
+
+
+class _RecordedRequest:
+    def __init__(self, client, index):
+        self.client = client
+        self.index = index
+
+    def execute(self):
+        if self.client.latency:
+            time.sleep(self.client.latency)
+        with self.client._lock:
+            self.client.calls += 1
+        page = dict(self.client.pages[self.index])
+        if self.index + 1 < len(self.client.pages):
+            page["nextPageToken"] = str(self.index + 1)
+        else:
+            page.pop("nextPageToken", None)
+        return page
+
+
+class RecordedYouTubeClient:
+    """Replays commentThreads pages; page tokens are just page indexes.
+
+    `latency` (seconds) is slept per request to mimic network round-trips,
+    and `calls` counts how many pages were actually requested.
+    """
+
+    def __init__(self, pages, latency=0.0):
+        self.pages = pages
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, latency=0.0):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), latency)
+
+    def commentThreads(self):
+        return self
+
+    def list(self, part=None, videoId=None, maxResults=100, pageToken=None, **kwargs):
+        return _RecordedRequest(self, int(pageToken) if pageToken else 0)
+
+
+def record_youtube_pages(video_url, path, max_pages=5):
+    """Save real commentThreads pages for a video so they can be replayed offline."""
+    from backend.fetch_youtube import get_video_id, iter_youtube_pages
+
+    pages = []
+    for response in iter_youtube_pages(get_video_id(video_url), max_items=max_pages * 100):
+        pages.append({"items": response["items"]})
+        if len(pages) >= max_pages:
+            break
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(pages, f, ensure_ascii=False)
+    return len(pages)
+
+
+class FakeComment:
+    def __init__(self, body, replies=None):
+        self.body = body
+        self.replies = replies or []
+
+
+class FakeMoreComments:
+    """Collapsed subtree; `comments()` costs one simulated round-trip."""
+
+    def __init__(self, reddit, children):
+        self._reddit = reddit
+        self._children = children
+        self.count = _count_comments(children)
+
+    def comments(self, update=True):
+        self._reddit._request()
+        return self._children
+
+
+class FakeSubmission:
+    def __init__(self, reddit, forest):
+        self._reddit = reddit
+        self._forest = forest
+        self._loaded = False
+
+    @property
+    def comments(self):
+        if not self._loaded:
+            self._reddit._request()
+            self._loaded = True
+        return self._forest
+
+
+class FakeReddit:
+    """Local stand-in for praw.Reddit serving pre-built comment trees by URL.
+
+    Every submission load and MoreComments expansion sleeps `latency`
+    seconds and is counted in `requests`.
+    """
+
+    def __init__(self, threads, latency=0.0):
+        self.threads = threads
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _request(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+
+    def submission(self, url=None, id=None):
+        return FakeSubmission(self, self.threads[url or id](self))
+
+
+def _count_comments(nodes):
+    total = 0
+    for node in nodes:
+        if isinstance(node, FakeComment):
+            total += 1 + _count_comments(node.replies)
+        else:
+            total += node.count
+    return total
+
+
+def fake_reddit_thread(comments, visible=20, branching=4):
+    """Builder for a FakeReddit thread from plain texts.
+
+    Texts become a tree with `branching` replies per comment; at every level
+    only the first `visible` siblings are loaded and the rest sit behind a
+    FakeMoreComments, the way Reddit collapses big threads.
+    """
+    def build(reddit, texts):
+        if not texts:
+            return []
+        step = max(1, len(texts) // branching)
+        groups = [texts[i:i + step] for i in range(0, len(texts), step)]
+        siblings = [FakeComment(group[0], build(reddit, group[1:])) for group in groups]
+        if len(siblings) > visible:
+            return siblings[:visible] + [FakeMoreComments(reddit, siblings[visible:])]
+        return siblings
+
+    return lambda reddit: build(reddit, list(comments))
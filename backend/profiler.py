@@ -0,0 +1,74 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Per-request sampling profiles (/analyze?profile=true) are off unless enabled
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+# Seconds between stack samples
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+# A thread whose innermost frame is in one of these is just waiting
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "thread.py")
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack on a timer while it is running.
+
+    The work for one request is spread over the event loop, pool threads and
+    the batch scheduler threads, so all threads are sampled; stacks of other
+    requests running at the same time show up too. Threads blocked in a
+    wait are skipped unless `include_idle` is set.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL, max_depth=40, include_idle=False):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if not self.include_idle and os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+        return False
+
+    def report(self, top=25):
+        """Most sampled stacks, root first, in the collapsed format flame graph tools read."""
+        return {
+            "seconds": round(self.seconds, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "stacks": [{"stack": stack, "samples": count} for stack, count in self._stacks.most_common(top)]
+        }
@@ -0,0 +1,109 @@
+"""Columnar form of analyze_comments results for vectorized aggregation.
+
+Each dimension ("sentiment", "emotion") is an integer array of label codes
+plus a float32 array of scores, one row per comment in result order, so
+counts, percentages and confidence buckets are single NumPy passes instead
+of loops over result dicts.
+"""
+import threading
+
+import numpy as np
+
+DIMENSIONS = ("sentiment", "emotion")
+
+# Lower bounds of the confidence buckets (classify_confidence in app), lowest first
+CONFIDENCE_BOUNDS = (0.4, 0.6, 0.8)
+CONFIDENCE_LABELS = ("very_low", "low", "medium", "high")
+
+
+class LabelCodes:
+    """Append-only label <-> code table shared by every result in the process.
+
+    Labels get codes in order of first appearance; override rules can
+    introduce labels the models don't have, so the table is not fixed.
+    """
+
+    def __init__(self):
+        self.labels = []
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def code(self, label):
+        code = self._codes.get(label)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(label)
+                if code is None:
+                    code = self._codes[label] = len(self.labels)
+                    self.labels.append(label)
+        return code
+
+
+label_codes = {dimension: LabelCodes() for dimension in DIMENSIONS}
+
+
+def confidence_codes(scores):
+    """Bucket index into CONFIDENCE_LABELS per score, as classify_confidence assigns them."""
+    return np.searchsorted(np.asarray(CONFIDENCE_BOUNDS, dtype=np.float32), scores, side="right")
+
+
+class ResultColumns:
+    """Label codes (lowercase labels, see label_codes) and scores per dimension."""
+
+    def __init__(self, codes, scores):
+        self.codes = codes      # dimension -> uint16 array
+        self.scores = scores    # dimension -> float32 array
+
+    @classmethod
+    def from_results(cls, results):
+        """Columns for a list of CommentResult."""
+        codes, scores = {}, {}
+        for dimension in DIMENSIONS:
+            code = label_codes[dimension].code
+            predictions = [getattr(result, dimension) for result in results]
+            codes[dimension] = np.fromiter(
+                (code(p.label.lower()) for p in predictions), dtype=np.uint16, count=len(results)
+            )
+            scores[dimension] = np.fromiter((p.score for p in predictions), dtype=np.float32, count=len(results))
+        return cls(codes, scores)
+
+    @classmethod
+    def concat(cls, parts):
+        return cls(
+            {d: np.concatenate([p.codes[d] for p in parts]) for d in DIMENSIONS},
+            {d: np.concatenate([p.scores[d] for p in parts]) for d in DIMENSIONS}
+        )
+
+    def __len__(self):
+        return len(self.codes[DIMENSIONS[0]])
+
+    def __getitem__(self, rows):
+        """Columns for a slice of rows (views, not copies)."""
+        return ResultColumns({d: self.codes[d][rows] for d in DIMENSIONS},
+                             {d: self.scores[d][rows] for d in DIMENSIONS})
+
+    def counts(self, dimension):
+        """{label: comments} for every label that occurs."""
+        labels = label_codes[dimension].labels
+        counts = np.bincount(self.codes[dimension], minlength=len(labels))
+        return {labels[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+    def percentages(self, dimension):
+        """Share of comments per label in percent, rounded to one decimal."""
+        total = len(self)
+        return {label: round(count / total * 100, 1) if total else 0.0
+                for label, count in self.counts(dimension).items()}
+
+    def confidence(self, dimension):
+        """{bucket: comments} over CONFIDENCE_LABELS, including empty buckets."""
+        counts = np.bincount(confidence_codes(self.scores[dimension]), minlength=len(CONFIDENCE_LABELS))
+        return dict(zip(CONFIDENCE_LABELS, counts.tolist()))
+
+    def rows_by_label(self, dimension):
+        """{label: uint32 array of row numbers}, rows ascending within each label."""
+        codes = self.codes[dimension]
+        labels = label_codes[dimension].labels
+        order = np.argsort(codes, kind="stable").astype(np.uint32)
+        counts = np.bincount(codes, minlength=len(labels))
+        ends = np.cumsum(counts)
+        return {labels[code]: order[ends[code] - counts[code]:ends[code]] for code in np.flatnonzero(counts)}
@@ -0,0 +1,53 @@
+"""Compact per-comment analysis results.
+
+analyze_comments produces one CommentResult per comment. The nested
+{"text", "sentiment": {...}, "emotion": {...}} dict the API has always
+returned is only built by `to_dict()`, where a result leaves the backend.
+"""
+import sys
+
+
+class Prediction:
+    """Final label and score for one dimension of one comment."""
+
+    __slots__ = ("label", "score", "original_label", "source")
+
+    def __init__(self, label, score, original_label, source):
+        # Interned so every comment with a label shares one string
+        self.label = sys.intern(label)
+        self.score = score
+        self.original_label = original_label  # mapped model label, None when a rule decided it
+        self.source = source                  # "model" or "rule"
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "score": self.score,
+            "original_label": self.original_label,  # For debugging
+            "source": self.source
+        }
+
+
+class CommentResult:
+    __slots__ = ("text", "sentiment", "emotion")
+
+    def __init__(self, text, sentiment, emotion):
+        self.text = text
+        self.sentiment = sentiment
+        self.emotion = emotion
+
+    def to_dict(self):
+        return {"text": self.text, "sentiment": self.sentiment.to_dict(), "emotion": self.emotion.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict, e.g. for results read back from the analysis store."""
+        def prediction(d):
+            return Prediction(d["label"], d["score"], d.get("original_label"), d.get("source", "model"))
+        return cls(data["text"], prediction(data["sentiment"]), prediction(data["emotion"]))
+
+    def __eq__(self, other):
+        return isinstance(other, CommentResult) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"CommentResult({self.to_dict()!r})"
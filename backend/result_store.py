@@ -0,0 +1,133 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.result_columns import DIMENSIONS, LabelCodes, ResultColumns
+from backend.result_records import CommentResult
+
+# Memory budget for per-analysis results kept for /filter-comments; the
+# least recently used analyses are dropped first and reloaded from the
+# analysis store if asked for again
+RESULT_CACHE_BYTES = int(os.getenv("RESULT_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+_NO_ROWS = np.empty(0, dtype=np.uint32)
+
+# Exact label, original label and source strings of retained results (None included)
+_values = LabelCodes()
+
+
+class AnalysisResults:
+    """One analysis' scored comments, stored column-wise, plus per-label positions into them.
+
+    Only the comment texts stay Python objects; labels, original labels and
+    sources are uint16 codes and scores float32, about 30 bytes per comment
+    besides its text. `index[filter_type][label]` is a uint32 array of row
+    numbers. Result dicts are built only for the rows a page returns. Pass
+    the `columns` analyze_comments returned to reuse its label codes.
+    """
+
+    def __init__(self, results, columns=None):
+        columns = columns if columns is not None else ResultColumns.from_results(results)
+        code = _values.code
+        self.texts = [result.text for result in results]
+        # Copies, so slices of a larger batch (as jobs pass) don't keep the whole batch alive
+        self.scores = {dimension: columns.scores[dimension].copy() for dimension in DIMENSIONS}
+        self.labels, self.original_labels, self.sources = {}, {}, {}
+        for dimension in DIMENSIONS:
+            predictions = [getattr(result, dimension) for result in results]
+            for column, attribute in ((self.labels, "label"), (self.original_labels, "original_label"),
+                                      (self.sources, "source")):
+                column[dimension] = np.fromiter(
+                    (code(getattr(p, attribute)) for p in predictions), dtype=np.uint16, count=len(results)
+                )
+        self.index = {filter_type: columns.rows_by_label(filter_type) for filter_type in DIMENSIONS}
+
+        arrays = [*self.scores.values(), *self.labels.values(), *self.original_labels.values(),
+                  *self.sources.values(), *(rows for labels in self.index.values() for rows in labels.values())]
+        self.size_bytes = (sys.getsizeof(self.texts) + sum(sys.getsizeof(text) for text in self.texts)
+                           + sum(array.nbytes for array in arrays))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def result(self, row):
+        """The API dict for one row, as CommentResult.to_dict() gives it."""
+        values = _values.labels
+        return {
+            "text": self.texts[row],
+            **{
+                dimension: {
+                    "label": values[self.labels[dimension][row]],
+                    # float32 keeps the 4 decimals results are rounded to
+                    "score": round(float(self.scores[dimension][row]), 4),
+                    "original_label": values[self.original_labels[dimension][row]],
+                    "source": values[self.sources[dimension][row]]
+                }
+                for dimension in DIMENSIONS
+            }
+        }
+
+    def page(self, filter_type, label, limit, cursor=0):
+        """Up to `limit` results for a label from position `cursor`, the total count and the next cursor."""
+        rows = self.index[filter_type].get(label, _NO_ROWS)
+        chunk = rows[cursor:cursor + limit]
+        next_cursor = cursor + len(chunk) if cursor + len(chunk) < len(rows) else None
+        return [self.result(row) for row in chunk], len(rows), next_cursor
+
+
+class ResultStore:
+    """Per-analysis results by analysis_id, kept in memory under a byte budget.
+
+    Results are also written to the analysis store, so an analysis made on
+    another worker, or evicted from memory here, is read back from SQLite.
+    """
+
+    def __init__(self, store, max_bytes=RESULT_CACHE_BYTES):
+        self.store = store
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, analysis_id, results, columns=None):
+        """Keep a list of CommentResult (stored as dicts) for /filter-comments."""
+        self.store.save_results(analysis_id, [result.to_dict() for result in results])
+        self._remember(analysis_id, AnalysisResults(results, columns))
+
+    def get(self, analysis_id):
+        """AnalysisResults for an id, or None if it was never stored or has expired."""
+        with self._lock:
+            entry = self._memory.get(analysis_id)
+            if entry is not None:
+                self._memory.move_to_end(analysis_id)
+                return entry
+
+        results = self.store.load_results(analysis_id)
+        if results is None:
+            return None
+        entry = AnalysisResults([CommentResult.from_dict(result) for result in results])
+        self._remember(analysis_id, entry)
+        return entry
+
+    def _remember(self, analysis_id, entry):
+        with self._lock:
+            previous = self._memory.pop(analysis_id, None)
+            if previous is not None:
+                self._bytes -= previous.size_bytes
+            self._memory[analysis_id] = entry
+            self._bytes += entry.size_bytes
+            # Always keep the newest analysis, even if it alone is over budget
+            while self._bytes > self.max_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._bytes -= evicted.size_bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "analyses": len(self._memory),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
@@ -0,0 +1,186 @@
+"""Keyword and emoji override rules compiled into a single automaton.
+
+Rules can come from the built-in dicts in sentiment_model or from a JSON
+file (RULES_FILE) that is reloaded when it changes:
+
+    {
+      "sentiment": [
+        {"label": "positive", "keywords": ["recommend", "love"]},
+        {"label": "negative", "keywords": ["worst"], "priority": 0}
+      ],
+      "emotion": [
+        {"pattern": "😡", "label": "anger"},
+        {"pattern": ":(", "label": "sadness"}
+      ]
+    }
+
+Within each dimension the rule with the lowest priority wins; priority
+defaults to the rule's position in the file, so file order is the same
+"first match wins" order the built-in dicts use.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class RuleSet:
+    """All override rules as one Aho-Corasick automaton.
+
+    Every pattern is matched in a single pass over the text, so the cost is
+    linear in text length however many rules there are. Each automaton state
+    stores the best (lowest priority) rule per dimension reachable through
+    its failure links, so a scan only tracks one winner per dimension.
+    """
+
+    def __init__(self, sentiment_rules, emotion_rules):
+        # sentiment_rules / emotion_rules: [(pattern, label, priority), ...]
+        self.rule_count = len(sentiment_rules) + len(emotion_rules)
+        self._goto = [{}]
+        self._best = [{}]
+        for dimension, rules in (("sentiment", sentiment_rules), ("emotion", emotion_rules)):
+            for pattern, label, priority in rules:
+                if dimension == "sentiment":
+                    # Only ever matched against lowercased text
+                    pattern = pattern.lower()
+                if pattern:
+                    self._add(pattern, dimension, label, priority)
+        self._fail = self._link()
+
+    def _add(self, pattern, dimension, label, priority):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._best.append({})
+                self._goto[state][ch] = nxt
+            state = nxt
+        current = self._best[state].get(dimension)
+        if current is None or priority < current[0]:
+            self._best[state][dimension] = (priority, label)
+
+    def _link(self):
+        goto, best = self._goto, self._best
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if state else 0
+                # Inherit whatever shorter patterns end at this position too
+                for dimension, rule in best[fail[nxt]].items():
+                    current = best[nxt].get(dimension)
+                    if current is None or rule[0] < current[0]:
+                        best[nxt][dimension] = rule
+        return fail
+
+    def _scan(self, text, dimensions, found):
+        goto, fail, best = self._goto, self._fail, self._best
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for dimension, rule in best[state].items():
+                if dimension in dimensions:
+                    current = found.get(dimension)
+                    if current is None or rule[0] < current[0]:
+                        found[dimension] = rule
+
+    def match(self, text, text_lower=None):
+        """Return (sentiment_label, emotion_label) of the winning rules, None where nothing matched.
+
+        Sentiment keywords are matched case-insensitively; emotion patterns
+        as written, against both the lowercased and the original text.
+        """
+        if text_lower is None:
+            text_lower = text.lower()
+        found = {}
+        self._scan(text_lower, ("sentiment", "emotion"), found)
+        if text != text_lower:
+            self._scan(text, ("emotion",), found)
+        sentiment = found.get("sentiment")
+        emotion = found.get("emotion")
+        return (sentiment[1] if sentiment else None, emotion[1] if emotion else None)
+
+
+def rules_from_dicts(sentiment_keywords, emotion_overrides):
+    """Build a RuleSet from the SENTIMENT_KEYWORDS / EMOTION_OVERRIDES dict layout."""
+    sentiment_rules = [
+        (keyword, label, priority)
+        for priority, (label, keywords) in enumerate(sentiment_keywords.items())
+        for keyword in keywords
+    ]
+    emotion_rules = [
+        (pattern, label, priority)
+        for priority, (pattern, label) in enumerate(emotion_overrides.items())
+    ]
+    return RuleSet(sentiment_rules, emotion_rules)
+
+
+def rules_from_file(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    sentiment_rules = [
+        (keyword, entry["label"].lower(), entry.get("priority", position))
+        for position, entry in enumerate(config.get("sentiment", []))
+        for keyword in entry["keywords"]
+    ]
+    emotion_rules = [
+        (entry["pattern"], entry["label"].lower(), entry.get("priority", position))
+        for position, entry in enumerate(config.get("emotion", []))
+    ]
+    return RuleSet(sentiment_rules, emotion_rules)
+
+
+class RuleEngine:
+    """Serves the current RuleSet, reloading the rules file when it changes.
+
+    The file's mtime is checked at most every `reload_interval` seconds. A
+    file that fails to parse is logged and the previous rules stay active.
+    """
+
+    def __init__(self, default_rules, path=None, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._rules = default_rules
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        if path:
+            self._reload_if_changed(force=True)
+
+    def current(self) -> RuleSet:
+        if self.path and time.monotonic() - self._checked_at >= self.reload_interval:
+            self._reload_if_changed()
+        return self._rules
+
+    def _reload_if_changed(self, force=False):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                logger.error(f"Rules file unavailable, keeping current rules: {str(e)}")
+                return
+            if not force and mtime == self._mtime:
+                return
+            try:
+                rules = rules_from_file(self.path)
+            except Exception as e:
+                logger.error(f"Failed to load rules from {self.path}, keeping current rules: {str(e)}")
+                return
+            self._rules = rules
+            self._mtime = mtime
+            logger.info(f"Loaded {rules.rule_count} rules from {self.path}")
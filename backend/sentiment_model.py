@@ -1,32 +1,55 @@
-from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
+import os
+from collections import Counter
 
-# Initialize models with explicit model and tokenizer loading
-sentiment_model = AutoModelForSequenceClassification.from_pretrained(
-    "nlptown/bert-base-multilingual-uncased-sentiment"
-)
-sentiment_tokenizer = AutoTokenizer.from_pretrained(
-    "nlptown/bert-base-multilingual-uncased-sentiment"
+from backend.batch_scheduler import BatchScheduler
+from backend.dedup import deduplicate
+from backend.inference_cache import inference_cache, cache_key
+from backend.metrics import (
+    current_platform, model_seconds, stage_seconds, comments_processed, overrides_fired, duplicates_skipped
 )
+from backend.model_registry import model_registry, MODEL_LOADING
+from backend.result_columns import ResultColumns
+from backend.result_records import CommentResult, Prediction
+from backend.rules import RuleEngine, rules_from_dicts
+from backend.shared_encoder import load_shared_encoder, heads_fingerprint, SHARED_HEADS_PATH
+from backend.text_prep import clean_text, model_text, token_windows, CHUNK_STRIDE, MAX_CHUNKS
 
-emotion_model = AutoModelForSequenceClassification.from_pretrained(
-    "j-hartmann/emotion-english-distilroberta-base"
-)
-emotion_tokenizer = AutoTokenizer.from_pretrained(
-    "j-hartmann/emotion-english-distilroberta-base"
-)
+# Batched inference settings (override via environment)
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "32"))
+MAX_SEQ_LENGTH = int(os.getenv("MAX_SEQ_LENGTH", "512"))
 
-# Create pipelines with explicitly loaded components
-sentiment_pipeline = pipeline(
-    task="text-classification",
-    model=sentiment_model,
-    tokenizer=sentiment_tokenizer
-)
+# Cross-request dynamic batching (set BATCH_SCHEDULER=0 to run each request alone)
+USE_BATCH_SCHEDULER = os.getenv("BATCH_SCHEDULER", "1") == "1"
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
 
-emotion_pipeline = pipeline(
-    task="text-classification",
-    model=emotion_model,
-    tokenizer=emotion_tokenizer
-)
+# "model_first": run both models on every comment, then apply the override rules
+# "rules_first": run the rules first and skip a model wherever a rule already
+# decided that label, scoring it RULE_SCORE instead
+RULE_EVAL_ORDER = os.getenv("RULE_EVAL_ORDER", "model_first").lower()
+RULE_SCORE = float(os.getenv("RULE_SCORE", "1.0"))
+
+SENTIMENT_MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+EMOTION_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+
+# Inference backend per model: torch (fp32), int8 or onnx
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch").lower()
+EMOTION_BACKEND = os.getenv("EMOTION_BACKEND", "torch").lower()
+
+# "separate": a full sentiment model and a full emotion model per comment
+# "shared": one pass of the sentiment model, whose embedding also feeds a
+# distilled emotion head (see backend/shared_encoder.py); SENTIMENT_BACKEND applies
+ENCODER_MODE = os.getenv("ENCODER_MODE", "separate").lower()
+
+# Models are loaded by the registry (see MODEL_LOADING) instead of at import
+SHARED_HEAD_VERSION = heads_fingerprint(SHARED_HEADS_PATH) if ENCODER_MODE == "shared" else None
+if ENCODER_MODE == "shared":
+    model_registry.register("shared", SENTIMENT_MODEL_NAME, SENTIMENT_BACKEND, loader=load_shared_encoder)
+else:
+    model_registry.register("sentiment", SENTIMENT_MODEL_NAME, SENTIMENT_BACKEND)
+    model_registry.register("emotion", EMOTION_MODEL_NAME, EMOTION_BACKEND)
+
+if MODEL_LOADING == "eager":
+    model_registry.preload()
 
 # Rest of your code remains the same...
 # Label mappings
@@ -66,69 +89,310 @@ SENTIMENT_KEYWORDS = {
     "neutral": ["maybe", "perhaps", "consider", "possibly"]
 }
 
-def analyze_comments(comments: list):
-    results = []
-    categorized = {
-        'sentiment': {'positive': [], 'negative': [], 'neutral': []},
-        'emotion': {e.lower(): [] for e in emotion_map.values()}
-    }
-    
-    for text in comments:
-        text = text.strip()
-        text_lower = text.lower()
-        
-        # ===== Sentiment Analysis =====
-        sentiment = sentiment_pipeline(text)[0]
+# Rules are compiled once; RULES_FILE replaces the built-in ones and is hot reloaded
+rule_engine = RuleEngine(
+    rules_from_dicts(SENTIMENT_KEYWORDS, EMOTION_OVERRIDES),
+    path=os.getenv("RULES_FILE") or None,
+    reload_interval=float(os.getenv("RULES_RELOAD_INTERVAL", "5"))
+)
+
+def _predict_batched(loaded, texts, batch_size, max_length):
+    """Run a loaded classifier over texts in length-sorted micro-batches.
+
+    Returns one {"label", "score"} dict per text, in input order, matching
+    what the text-classification pipeline gives for a single text. Texts
+    longer than `max_length` tokens are scored as several windows whose
+    probabilities are averaged, weighted by window length. A model with
+    several heads (the shared encoder: a tuple of id2label maps, a tuple of
+    logits per batch) gives a tuple of predictions per text, one per head.
+    """
+    if not texts:
+        return []
+
+    multi_head = isinstance(loaded.id2label, tuple)
+    heads = loaded.id2label if multi_head else (loaded.id2label,)
+    tokenizer = loaded.tokenizer
+    max_length = min(max_length, tokenizer.model_max_length)
+    with model_seconds.time(model=loaded.name, phase="tokenize"):
+        windows, owners = token_windows(tokenizer, texts, max_length)
+    keys = list(windows.keys())
+    window_counts = Counter(owners)
+
+    # Sort by token count so each batch only pads to its own longest window
+    order = sorted(range(len(owners)), key=lambda w: len(windows["input_ids"][w]))
+    predictions = [[None] * len(texts) for _ in heads]
+    chunked = [{} for _ in heads]  # per head: text index -> [weighted probability sum, total weight]
+
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        batch = tokenizer.pad(
+            [{k: windows[k][w] for k in keys} for w in chunk],
+            return_tensors="pt"
+        )
+        with model_seconds.time(model=loaded.name, phase="forward"):
+            outputs = loaded.runner(batch)
+        for head, logits in enumerate(outputs if multi_head else (outputs,)):
+            probs = logits.softmax(dim=-1)
+            scores, label_ids = probs.max(dim=-1)
+            for row, (w, score, label_id) in enumerate(zip(chunk, scores.tolist(), label_ids.tolist())):
+                i = owners[w]
+                if window_counts[i] == 1:
+                    predictions[head][i] = {"label": heads[head][label_id], "score": score}
+                    continue
+                weight = len(windows["input_ids"][w])
+                total = chunked[head].setdefault(i, [0, 0])
+                total[0] = total[0] + probs[row] * weight
+                total[1] += weight
+
+    for head, id2label in enumerate(heads):
+        for i, (prob_sum, weight) in chunked[head].items():
+            score, label_id = (prob_sum / weight).max(dim=-1)
+            predictions[head][i] = {"label": id2label[label_id.item()], "score": score.item()}
+
+    return list(zip(*predictions)) if multi_head else predictions[0]
+
+def _predict_with(kind, texts, batch_size, max_length):
+    if not texts:
+        return []
+    return _predict_batched(model_registry.get(kind), texts, batch_size, max_length)
+
+sentiment_scheduler = BatchScheduler(
+    "sentiment",
+    lambda texts: _predict_with("sentiment", texts, INFERENCE_BATCH_SIZE, MAX_SEQ_LENGTH),
+    max_batch_size=INFERENCE_BATCH_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+
+emotion_scheduler = BatchScheduler(
+    "emotion",
+    lambda texts: _predict_with("emotion", texts, INFERENCE_BATCH_SIZE, MAX_SEQ_LENGTH),
+    max_batch_size=INFERENCE_BATCH_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+
+shared_scheduler = BatchScheduler(
+    "shared",
+    lambda texts: _predict_with("shared", texts, INFERENCE_BATCH_SIZE, MAX_SEQ_LENGTH),
+    max_batch_size=INFERENCE_BATCH_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+
+# The schedulers this encoder mode uses, by model kind
+if ENCODER_MODE == "shared":
+    schedulers = {"shared": shared_scheduler}
+else:
+    schedulers = {"sentiment": sentiment_scheduler, "emotion": emotion_scheduler}
+
+def _submit(kind, texts, batch_size, max_length):
+    """Start predictions for texts on one model, serving what it can from the cache.
+
+    Returns a function that blocks until every prediction is available.
+    """
+    scheduler = schedulers[kind]
+    # Windowing settings change the result for long texts
+    model_id = f"{model_registry.identity(kind)}:{max_length}:{CHUNK_STRIDE}:{MAX_CHUNKS}"
+    keys = [cache_key(model_id, text) for text in texts]
+    cached = inference_cache.get_many(keys) if inference_cache.enabled else {}
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    missing_texts = [texts[i] for i in missing]
+
+    if USE_BATCH_SCHEDULER and batch_size == INFERENCE_BATCH_SIZE and max_length == MAX_SEQ_LENGTH:
+        # Share batches with whatever other requests are in flight
+        futures = scheduler.submit(missing_texts)
+        wait = lambda: [f.result() for f in futures]
+    else:
+        fresh = _predict_with(kind, missing_texts, batch_size, max_length)
+        wait = lambda: fresh
+
+    def collect():
+        fresh = wait()
+        if inference_cache.enabled:
+            inference_cache.put_many({keys[i]: p for i, p in zip(missing, fresh)})
+        predictions = [cached.get(key) for key in keys]
+        for i, prediction in zip(missing, fresh):
+            predictions[i] = prediction
+        return predictions
+
+    return collect
+
+def _submit_shared(sentiment_texts, emotion_texts, batch_size, max_length):
+    """Like _submit, for the shared encoder: each text missing from the cache
+    for either head goes through the backbone once and fills both heads.
+
+    Returns a function that blocks until (sentiment predictions, emotion predictions) are available.
+    """
+    # The emotion head's predictions depend on the trained heads, not just the backbone
+    model_id = f"{model_registry.identity('shared')}:{SHARED_HEAD_VERSION}:{max_length}:{CHUNK_STRIDE}:{MAX_CHUNKS}"
+    sentiment_keys = [cache_key(f"{model_id}:sentiment", text) for text in sentiment_texts]
+    emotion_keys = [cache_key(f"{model_id}:emotion", text) for text in emotion_texts]
+    cached = inference_cache.get_many(sentiment_keys + emotion_keys) if inference_cache.enabled else {}
+
+    missing = {}  # text -> position in missing_texts
+    for texts, keys in ((sentiment_texts, sentiment_keys), (emotion_texts, emotion_keys)):
+        for text, key in zip(texts, keys):
+            if key not in cached:
+                missing.setdefault(text, len(missing))
+    missing_texts = list(missing)
+
+    if USE_BATCH_SCHEDULER and batch_size == INFERENCE_BATCH_SIZE and max_length == MAX_SEQ_LENGTH:
+        futures = shared_scheduler.submit(missing_texts)
+        wait = lambda: [f.result() for f in futures]
+    else:
+        fresh = _predict_with("shared", missing_texts, batch_size, max_length)
+        wait = lambda: fresh
+
+    def collect():
+        fresh = wait()
+        if inference_cache.enabled:
+            new = {}
+            for text, (sentiment, emotion) in zip(missing_texts, fresh):
+                new[cache_key(f"{model_id}:sentiment", text)] = sentiment
+                new[cache_key(f"{model_id}:emotion", text)] = emotion
+            inference_cache.put_many(new)
+        outputs = []
+        for head, (texts, keys) in enumerate(((sentiment_texts, sentiment_keys), (emotion_texts, emotion_keys))):
+            outputs.append([
+                fresh[missing[text]][head] if text in missing else cached[key]
+                for text, key in zip(texts, keys)
+            ])
+        return outputs[0], outputs[1]
+
+    return collect
+
+def _predict_both(sentiment_texts, emotion_texts, batch_size, max_length):
+    if ENCODER_MODE == "shared":
+        return _submit_shared(sentiment_texts, emotion_texts, batch_size, max_length)()
+    # Queue on both models before waiting so they run in parallel
+    collect_sentiment = _submit("sentiment", sentiment_texts, batch_size, max_length)
+    collect_emotion = _submit("emotion", emotion_texts, batch_size, max_length)
+    return collect_sentiment(), collect_emotion()
+
+def predict_sentiment_labels(texts: list):
+    """Model sentiment label ("Positive", "Negative", "Neutral") per text, without override rules."""
+    texts = [model_text(clean_text(text)) for text in texts]
+    if ENCODER_MODE == "shared":
+        predictions, _ = _submit_shared(texts, [], INFERENCE_BATCH_SIZE, MAX_SEQ_LENGTH)()
+    else:
+        predictions = _submit("sentiment", texts, INFERENCE_BATCH_SIZE, MAX_SEQ_LENGTH)()
+    return [sentiment_map.get(p['label'], "Neutral") for p in predictions]
+
+def _build_result(text, sentiment, emotion, overrides):
+    """Combine model predictions and rule overrides into the final labels.
+
+    `sentiment` / `emotion` are None when rules-first evaluation skipped that
+    model because a rule had already decided the label. Each label records
+    its "source": "rule" if an override produced it, otherwise "model".
+    """
+    sentiment_override, emotion_override = overrides
+
+    # ===== Sentiment Analysis =====
+    if sentiment is None:
+        sentiment_score = RULE_SCORE
+        base_sentiment = None
+        final_sentiment = sentiment_override.capitalize()
+        sentiment_source = "rule"
+    else:
         sentiment_score = sentiment['score']
         base_sentiment = sentiment_map.get(sentiment['label'], "Neutral")
-        
+
         # Apply confidence threshold (0.4 minimum)
         if sentiment_score < 0.4:
             final_sentiment = "Neutral"
         else:
             final_sentiment = base_sentiment
-        
+        sentiment_source = "model"
+
         # Keyword override
-        for sentiment_type, keywords in SENTIMENT_KEYWORDS.items():
-            if any(kw in text_lower for kw in keywords):
-                final_sentiment = sentiment_type.capitalize()
-                break
-        
-        # ===== Emotion Detection =====
-        emotion = emotion_pipeline(text)[0]
+        if sentiment_override:
+            final_sentiment = sentiment_override.capitalize()
+            sentiment_source = "rule"
+
+    # ===== Emotion Detection =====
+    if emotion is None:
+        emotion_score = RULE_SCORE
+        base_emotion = None
+        final_emotion = emotion_override.capitalize()
+        emotion_source = "rule"
+    else:
         base_emotion = emotion_map.get(emotion['label'], "Neutral")
         emotion_score = emotion['score']
-        
+
         # Emoji/keyword override
         final_emotion = base_emotion
-        for key, emotion in EMOTION_OVERRIDES.items():
-            if key in text_lower or key in text:
-                final_emotion = emotion.capitalize()
-                break
-        
+        emotion_source = "model"
+        if emotion_override:
+            final_emotion = emotion_override.capitalize()
+            emotion_source = "rule"
+
         # Confidence threshold for emotion
         if emotion_score < 0.5:
             final_emotion = "Neutral"
-        
-        # ===== Build Result =====
-        result = {
-            "text": text,
-            "sentiment": {
-                "label": final_sentiment,
-                "score": round(sentiment_score, 4),
-                "original_label": base_sentiment  # For debugging
-            },
-            "emotion": {
-                "label": final_emotion,
-                "score": round(emotion_score, 4),
-                "original_label": base_emotion  # For debugging
-            }
-        }
-        
+            emotion_source = "model"
+
+    # ===== Build Result =====
+    return CommentResult(
+        text,
+        Prediction(final_sentiment, round(sentiment_score, 4), base_sentiment, sentiment_source),
+        Prediction(final_emotion, round(emotion_score, 4), base_emotion, emotion_source)
+    )
+
+def analyze_comments(comments: list, batch_size: int = None, max_length: int = None,
+                     eval_order: str = None):
+    """Return (results, columns): one CommentResult per comment, plus the same
+    labels and scores as a ResultColumns for vectorized aggregation."""
+    batch_size = batch_size or INFERENCE_BATCH_SIZE
+    max_length = max_length or MAX_SEQ_LENGTH
+    eval_order = eval_order or RULE_EVAL_ORDER
+
+    results = []
+
+    # Cleaned text only feeds the rules and models; results keep the comment as fetched,
+    # since unescaping entities would turn inert "&lt;tag&gt;" into live markup downstream
+    texts = [clean_text(text) for text in comments]
+    inputs = [model_text(text) for text in texts]
+
+    platform = current_platform.get()
+    rules = rule_engine.current()
+    with stage_seconds.time(stage="rules", platform=platform):
+        overrides = [rules.match(text) for text in texts]
+
+    if eval_order == "rules_first":
+        # Only send each model the comments its rules left undecided
+        sentiment_idx = [i for i, (s, _) in enumerate(overrides) if s is None]
+        emotion_idx = [i for i, (_, e) in enumerate(overrides) if e is None]
+    else:
+        sentiment_idx = emotion_idx = range(len(texts))
+
+    # Score each distinct text once and fan predictions back out to its duplicates
+    with stage_seconds.time(stage="dedup", platform=platform):
+        sentiment_unique, sentiment_owners = deduplicate([inputs[i] for i in sentiment_idx])
+        if emotion_idx is sentiment_idx:
+            emotion_unique, emotion_owners = sentiment_unique, sentiment_owners
+        else:
+            emotion_unique, emotion_owners = deduplicate([inputs[i] for i in emotion_idx])
+    duplicates_skipped.inc(len(sentiment_owners) - len(sentiment_unique), model="sentiment")
+    duplicates_skipped.inc(len(emotion_owners) - len(emotion_unique), model="emotion")
+
+    # Batched passes per model over the distinct texts
+    with stage_seconds.time(stage="inference", platform=platform):
+        sentiment_scored, emotion_scored = _predict_both(sentiment_unique, emotion_unique, batch_size, max_length)
+    sentiment_found = [sentiment_scored[owner] for owner in sentiment_owners]
+    emotion_found = [emotion_scored[owner] for owner in emotion_owners]
+
+    sentiments = [None] * len(texts)
+    emotions = [None] * len(texts)
+    for i, prediction in zip(sentiment_idx, sentiment_found):
+        sentiments[i] = prediction
+    for i, prediction in zip(emotion_idx, emotion_found):
+        emotions[i] = prediction
+
+    for comment, sentiment, emotion, override in zip(comments, sentiments, emotions, overrides):
+        result = _build_result(comment.strip(), sentiment, emotion, override)
         results.append(result)
-        
-        # Categorize for filtering
-        categorized['sentiment'][final_sentiment.lower()].append(result)
-        categorized['emotion'][final_emotion.lower()].append(result)
-    
-    return results, categorized
\ No newline at end of file
+
+        for dimension, prediction in (("sentiment", result.sentiment), ("emotion", result.emotion)):
+            if prediction.source == "rule":
+                overrides_fired.inc(dimension=dimension, label=prediction.label.lower())
+
+    comments_processed.inc(len(results), platform=platform)
+    return results, ResultColumns.from_results(results)
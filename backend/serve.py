@@ -0,0 +1,169 @@
+"""Multi-process server: load the models once, then fork workers that share them.
+
+    python -m backend.serve [--workers N] [--threads T] [--host 0.0.0.0] [--port 10000]
+
+One worker by default; more are opt-in (--workers, SERVE_WORKERS or
+WEB_CONCURRENCY, 0 for one per core).
+
+The master imports the app with MODEL_LOADING=eager, so the weights are
+loaded and the heap frozen (ModelRegistry.preload) before anything forks;
+workers then share those pages copy-on-write instead of each loading its
+own copy. The master binds the listening socket once and forks the
+workers, which all accept on it with their own uvicorn event loop. It
+restarts workers that die and forwards SIGTERM/SIGINT to them on shutdown.
+
+Torch (OpenMP/MKL) and tokenizer (Rayon) threads are capped per worker so
+the workers together use the available cores instead of each assuming it
+has all of them. Everything a worker keeps in memory (inference cache,
+result store, metrics) is per worker, and each worker refreshes its own
+/latest-comments snapshot, so N workers fetch that feed N times per
+interval: only add workers where the load test shows they pay off.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Worker processes; 0 means one per available core
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS") or os.getenv("WEB_CONCURRENCY") or "1")
+# Torch and tokenizer threads per worker; 0 splits the available cores evenly
+SERVE_THREADS = int(os.getenv("SERVE_THREADS", "0"))
+# Seconds to wait before replacing a worker that died, so a crash loop doesn't spin
+SERVE_RESTART_DELAY = float(os.getenv("SERVE_RESTART_DELAY", "1"))
+
+
+def available_cores():
+    """Cores this process may use: its CPU affinity, further capped by a cgroup v2 CPU quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def plan(workers=0, threads=0, cores=None):
+    """(workers, threads per worker), filling in the defaults from the available cores."""
+    cores = cores or available_cores()
+    workers = workers or cores
+    threads = threads or max(1, cores // workers)
+    return workers, threads
+
+
+def configure(workers=0, threads=0):
+    """Resolve the plan and set the environment the app is imported under.
+
+    Thread counts are read by OpenMP, MKL and Rayon when those libraries
+    load, so call this before anything imports torch or tokenizers.
+    """
+    workers, threads = plan(workers, threads)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "RAYON_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "true" if threads > 1 else "false"
+    os.environ["MODEL_LOADING"] = "eager"
+    return workers, threads
+
+
+def _bind(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock, threads, log_level):
+    import torch
+    import uvicorn
+
+    torch.set_num_threads(threads)
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(workers=SERVE_WORKERS, threads=SERVE_THREADS, host="0.0.0.0", port=10000, log_level="info"):
+    workers, threads = configure(workers, threads)
+
+    started = time.perf_counter()
+    from backend.app import app  # loads the models, before any fork
+    logger.info(f"Loaded the app in {time.perf_counter() - started:.1f}s; "
+                f"starting {workers} workers with {threads} threads each on {host}:{port}")
+
+    sock = _bind(host, port)
+    children = {}
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            # uvicorn installs its own handlers for a graceful shutdown
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _run_worker(app, sock, threads, log_level)
+            except BaseException:
+                logger.exception(f"Worker {index} failed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logger.warning(f"Worker {index} (pid {pid}) exited with status {status}; restarting")
+        time.sleep(SERVE_RESTART_DELAY)
+        if not stopping:
+            spawn(index)
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve backend.app from pre-forked workers sharing the models")
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="0: one per available core")
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS, help="Per worker; 0: split the cores")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "10000")))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    serve(args.workers, args.threads, args.host, args.port, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
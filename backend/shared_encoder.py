@@ -0,0 +1,87 @@
+"""Single-encoder mode: one backbone pass feeds both the sentiment and emotion heads.
+
+The backbone is the sentiment model, so its own classification head gives
+exactly the sentiment predictions of the two-model path. The emotion head
+is a linear layer over the backbone's mean-pooled embedding, distilled
+offline from the emotion model's probabilities (python -m
+backend.model_export train-shared) and stored at SHARED_HEADS_PATH.
+"""
+import hashlib
+import os
+import time
+
+import torch
+
+from backend.inference_backends import quantize_int8
+from backend.model_registry import LoadedModel, load_model
+
+SHARED_HEADS_PATH = os.getenv("SHARED_HEADS_PATH", "models/shared_heads.pt")
+
+
+def mean_pool(hidden, attention_mask):
+    """Average of the token embeddings, ignoring padding."""
+    mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+    return (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+
+
+def encode(model, batch):
+    """One forward pass: (classifier logits, pooled embedding) per row."""
+    outputs = model(**batch, output_hidden_states=True)
+    return outputs.logits, mean_pool(outputs.hidden_states[-1], batch["attention_mask"])
+
+
+def heads_fingerprint(path=SHARED_HEADS_PATH):
+    """Content hash of the trained heads, so cached predictions change with them."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    except OSError:
+        return "missing"
+
+
+class SharedEncoderRunner:
+    """Runs the backbone once per batch and returns (sentiment logits, emotion logits)."""
+
+    def __init__(self, model, emotion_head):
+        self.model = model
+        self.emotion_head = emotion_head
+
+    def __call__(self, batch):
+        with torch.no_grad():
+            sentiment_logits, embedding = encode(self.model, batch)
+            return sentiment_logits, self.emotion_head(embedding)
+
+
+def load_heads(path=SHARED_HEADS_PATH):
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No shared encoder heads at {path}; run python -m backend.model_export train-shared first"
+        )
+    return torch.load(path, map_location="cpu")
+
+
+def load_shared_encoder(kind, name, backend="torch", local_files_only=False, heads_path=SHARED_HEADS_PATH) -> LoadedModel:
+    """Load the backbone `name` with its own head plus the distilled emotion head.
+
+    `id2label` is a (sentiment, emotion) pair and the runner returns a pair of
+    logits, which _predict_batched turns into a pair of predictions per text.
+    """
+    if backend == "onnx":
+        raise ValueError("The shared encoder runs on the torch or int8 backend, not onnx")
+
+    started = time.perf_counter()
+    heads = load_heads(heads_path)
+    if heads["backbone"] != name:
+        raise ValueError(f"Shared heads were trained on {heads['backbone']}, not {name}; retrain them")
+
+    backbone = load_model(kind, name, "torch", local_files_only)
+    emotion_head = torch.nn.Linear(heads["weight"].shape[1], heads["weight"].shape[0])
+    emotion_head.load_state_dict({"weight": heads["weight"], "bias": heads["bias"]})
+    emotion_head.eval()
+
+    # Quantized in place, so the fp32 backbone isn't kept alongside the int8 one
+    model = quantize_int8(backbone.model) if backend == "int8" else backbone.model
+    return LoadedModel(
+        name, backend, SharedEncoderRunner(model, emotion_head), backbone.tokenizer,
+        (backbone.id2label, heads["id2label"]), model, time.perf_counter() - started
+    )
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotRefresher:
+    """Keeps the latest result of an expensive async `build()` ready to serve.
+
+    A background task rebuilds the snapshot every `interval` seconds. Reads
+    return the current snapshot straight away; once it is older than
+    `max_age` a read also kicks off a rebuild (stale-while-revalidate).
+    Concurrent refreshes share one in-flight build, and a failed build
+    keeps the previous snapshot.
+    """
+
+    def __init__(self, name, build, interval, max_age):
+        self.name = name
+        self.build = build
+        self.interval = interval
+        self.max_age = max_age
+        self.value = None
+        self.updated_at = None
+        self._inflight = None
+        self._task = None
+
+    @property
+    def age(self):
+        return None if self.updated_at is None else time.time() - self.updated_at
+
+    def refresh(self):
+        """Start a rebuild unless one is already running; returns the shared task."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._rebuild())
+        return self._inflight
+
+    async def _rebuild(self):
+        started = time.monotonic()
+        try:
+            self.value = await self.build()
+            self.updated_at = time.time()
+            logger.info(f"Refreshed {self.name} in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            logger.error(f"Refreshing {self.name} failed, keeping previous snapshot: {str(e)}")
+        return self.value
+
+    async def get(self, wait=None):
+        """Current snapshot; waits up to `wait` seconds only if none was built yet."""
+        if self.value is None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(self.refresh()), wait)
+            except asyncio.TimeoutError:
+                return None
+        if self.age > self.max_age:
+            self.refresh()
+        return self.value
+
+    async def _run(self):
+        while True:
+            await asyncio.shield(self.refresh())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        for task in (self._task, self._inflight):
+            if task is not None:
+                task.cancel()
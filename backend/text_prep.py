@@ -0,0 +1,68 @@
+"""Text preparation between the fetchers and the models.
+
+`clean_text` turns raw API text into what a person would read (YouTube's
+textDisplay is HTML) for the override rules, `model_text` additionally
+masks URLs for the classifiers, and `token_windows` splits long comments into overlapping,
+token-bounded windows so nothing past the model's limit is silently lost.
+"""
+import html
+import os
+import re
+
+# Tokens shared by consecutive windows of a long comment
+CHUNK_STRIDE = int(os.getenv("CHUNK_STRIDE", "32"))
+# Windows scored per comment; text past the last one is dropped, which keeps
+# the cost of one very long comment bounded
+MAX_CHUNKS = int(os.getenv("MAX_CHUNKS", "8"))
+
+# Only the handful of tags YouTube emits, with attribute syntax, so "a<b and c>d" survives
+_TAG = re.compile(
+    r"<br\s*/?>|</?(?:a|b|i|s|span|p|div)(?:\s+[\w-]+=(?:\"[^\"]*\"|'[^']*'|[^\s>]+))*\s*>",
+    re.IGNORECASE
+)
+_URL = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def clean_text(text):
+    """Unescape HTML entities, drop the markup YouTube adds and collapse whitespace.
+
+    Rule and model input only: the result is not safe to render as HTML.
+    """
+    text = _TAG.sub(" ", text)
+    text = html.unescape(text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def model_text(text):
+    """Classifier input for already cleaned text: URLs become a plain "http" token."""
+    return _URL.sub("http", text)
+
+
+def token_windows(tokenizer, texts, max_length, stride=CHUNK_STRIDE, max_chunks=MAX_CHUNKS):
+    """Tokenize texts into windows of at most `max_length` tokens.
+
+    Returns (windows, owners): `windows` maps each tokenizer output key to a
+    list with one entry per window, and `owners[w]` is the index of the text
+    window `w` came from. Texts that fit produce exactly one window, encoded
+    as plain truncating tokenization would.
+    """
+    encoded = tokenizer(texts, truncation=True, max_length=max_length,
+                        return_overflowing_tokens=True, stride=min(stride, max_length // 2))
+    keys = [k for k in encoded.keys() if k != "overflow_to_sample_mapping"]
+    mapping = encoded.get("overflow_to_sample_mapping")
+    if mapping is None:
+        # Slow tokenizers don't report windows; fall back to one truncated window per text
+        return {k: encoded[k] for k in keys}, list(range(len(texts)))
+
+    windows = {k: [] for k in keys}
+    owners = []
+    per_text = [0] * len(texts)
+    for w, owner in enumerate(mapping):
+        if per_text[owner] >= max_chunks:
+            continue
+        per_text[owner] += 1
+        owners.append(owner)
+        for k in keys:
+            windows[k].append(encoded[k][w])
+    return windows, owners
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from backend.aggregates import entry_time
+
+# Hours of per-platform history kept in memory for /sentiment-trends
+TREND_HISTORY_HOURS = int(os.getenv("TREND_HISTORY_HOURS", str(24 * 30)))
+# Longer windows are downsampled so a chart gets at most this many points
+TREND_MAX_POINTS = int(os.getenv("TREND_MAX_POINTS", "48"))
+
+HOUR = 3600
+
+
+class HourlySeries:
+    """Label counts per hour for one platform, as a fixed-size ring of rows.
+
+    `counts` holds one row per hour and one column per label; `hours` holds
+    the absolute hour each row currently belongs to, so stale rows are told
+    apart from live ones without ever being cleared in bulk.
+    """
+
+    def __init__(self, columns, hours):
+        self.counts = np.zeros((hours, columns), dtype=np.uint32)
+        self.hours = np.full(hours, -1, dtype=np.int64)
+
+    def add(self, hour, row):
+        index = hour % len(self.hours)
+        if self.hours[index] != hour:
+            if self.hours[index] > hour:
+                return  # older than the history kept
+            self.counts[index] = 0
+            self.hours[index] = hour
+        self.counts[index] += row
+
+    def window(self, end_hour, hours):
+        """Counts for the `hours` hours ending at `end_hour`, oldest first."""
+        wanted = np.arange(end_hour - hours + 1, end_hour + 1, dtype=np.int64)
+        index = wanted % len(self.hours)
+        live = self.hours[index] == wanted
+        return np.where(live[:, None], self.counts[index], 0)
+
+
+class TrendEngine:
+    """Hourly sentiment and emotion counts per platform behind /sentiment-trends.
+
+    Like PlatformAggregates, analyses are folded in once by reading the
+    stored rows added since the last refresh; every comment of an analysis
+    lands in the hour the analysis was recorded. A query slices the ring
+    and sums groups of hours for coarser resolutions, so its cost depends
+    on the window asked for, not on how many analyses were stored.
+    """
+
+    def __init__(self, store, sentiment_labels, emotion_labels, sentiment_scores,
+                 history_hours=TREND_HISTORY_HOURS):
+        self.store = store
+        self.sentiment_labels = list(sentiment_labels)
+        self.emotion_labels = list(emotion_labels)
+        self.history_hours = history_hours
+        self._columns = {f"sentiment_{label}": i for i, label in enumerate(self.sentiment_labels)}
+        offset = len(self.sentiment_labels)
+        self._columns.update({f"emotion_{label}": offset + i for i, label in enumerate(self.emotion_labels)})
+        self._sentiment_weights = np.array([sentiment_scores[label] for label in self.sentiment_labels], dtype=np.float64)
+        self._series = {}
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def _platform(self, platform):
+        if platform not in self._series:
+            self._series[platform] = HourlySeries(len(self._columns), self.history_hours)
+        return self._series[platform]
+
+    def _row(self, entry):
+        row = np.zeros(len(self._columns), dtype=np.uint32)
+        for dimension in ("sentiment", "emotion"):
+            for label, count in entry["stats"][dimension].items():
+                column = self._columns.get(f"{dimension}_{label}")
+                if column is not None:  # labels outside the model's set are not charted
+                    row[column] += count
+        return row
+
+    def refresh(self):
+        with self._lock:
+            for entry in self.store.iter_entries(after_id=self._last_id):
+                hour = int(entry_time(entry) // HOUR)
+                self._platform(entry["platform"]).add(hour, self._row(entry))
+                self._last_id = entry["analysis_id"]
+
+    def default_resolution(self, window_hours):
+        return max(1, -(-window_hours // TREND_MAX_POINTS))
+
+    def trends(self, platforms, window_hours=24, resolution_hours=None, now=None):
+        """Per-platform sentiment index series and the emotion mix over the window.
+
+        The sentiment index is the mean sentiment score rescaled to 0-100
+        (0 all negative, 50 neutral, 100 all positive); buckets without any
+        comments are None so charts show a gap instead of a false zero.
+        """
+        if resolution_hours is None:
+            resolution_hours = self.default_resolution(window_hours)
+        points = -(-window_hours // resolution_hours)
+        span = points * resolution_hours
+        end_hour = int((now or time.time()) // HOUR)
+
+        self.refresh()
+        sentiment_columns = len(self.sentiment_labels)
+        series = {}
+        emotion_totals = np.zeros(len(self.emotion_labels), dtype=np.int64)
+        with self._lock:
+            for platform in platforms:
+                counts = self._platform(platform).window(end_hour, min(span, self.history_hours))
+                if len(counts) < span:  # pad the part of the window beyond the kept history
+                    counts = np.vstack([np.zeros((span - len(counts), counts.shape[1]), dtype=counts.dtype), counts])
+                buckets = counts.reshape(points, resolution_hours, -1).sum(axis=1, dtype=np.int64)
+
+                sentiment = buckets[:, :sentiment_columns]
+                totals = sentiment.sum(axis=1)
+                low, high = self._sentiment_weights.min(), self._sentiment_weights.max()
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    mean = sentiment @ self._sentiment_weights / totals
+                index = np.round((mean - low) / (high - low) * 100, 1)
+                series[platform] = [None if total == 0 else float(value) for value, total in zip(index, totals)]
+                emotion_totals += buckets[:, sentiment_columns:].sum(axis=0)
+
+        all_emotions = int(emotion_totals.sum())
+        emotions = {
+            label: round(float(count) / all_emotions * 100, 1) if all_emotions else 0.0
+            for label, count in zip(self.emotion_labels, emotion_totals)
+        }
+        starts = (end_hour - span + 1 + np.arange(points) * resolution_hours) * HOUR
+        # Hourly buckets only need the date once the window spans several days
+        if resolution_hours >= 24:
+            label_format = "%b %d"
+        elif window_hours > 24:
+            label_format = "%b %d %H:00"
+        else:
+            label_format = "%H:00"
+        time_labels = [time.strftime(label_format, time.gmtime(int(start))) for start in starts]
+        return time_labels, series, emotions
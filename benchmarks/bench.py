@@ -0,0 +1,319 @@
+"""Offline throughput and latency benchmarks for the analysis hot path.
+
+    python -m benchmarks.bench run [--batch-sizes 8 32] [--threads 1 4] [--backends torch int8]
+                                   [--comments 1000] [--request-size 50] [--concurrency 1]
+                                   [--endpoint-requests 20] [--output results.json]
+    python -m benchmarks.bench compare baseline.json candidate.json [--threshold 0.10]
+
+`run` benchmarks every combination of batch size, torch thread count and
+backend, each in a fresh process so load time and peak RSS belong to that
+configuration alone. Each one times `analyze_comments` over a seeded
+synthetic corpus and, unless --endpoint-requests is 0, the `/analyze`
+endpoint with the YouTube and Reddit fetchers replaced by offline_clients
+fakes. The inference cache is off, so every comment is really scored.
+
+`compare` matches configurations between two result files and exits
+non-zero when throughput, latency, memory or load time regressed by more
+than the threshold.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.corpus import synthetic_corpus
+
+# What identifies a configuration across result files
+CONFIG_KEYS = ("backend", "threads", "batch_size", "concurrency")
+
+# (metric path, True if higher is better) checked by `compare`
+COMPARED_METRICS = [
+    (("analyze", "comments_per_sec"), True),
+    (("analyze", "latency_ms", "p95"), False),
+    (("endpoint", "requests_per_sec"), True),
+    (("endpoint", "latency_ms", "p95"), False),
+    (("peak_rss_mb",), False),
+    (("model_load_seconds",), False)
+]
+
+
+def latency_summary(seconds):
+    import numpy as np
+
+    ms = np.array(seconds) * 1000
+    return {
+        "p50": round(float(np.percentile(ms, 50)), 2),
+        "p95": round(float(np.percentile(ms, 95)), 2),
+        "p99": round(float(np.percentile(ms, 99)), 2),
+        "mean": round(float(ms.mean()), 2),
+        "max": round(float(ms.max()), 2)
+    }
+
+
+def peak_rss_mb():
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _timed_calls(fn, jobs, concurrency):
+    """Run fn(job) for every job on `concurrency` threads; per-call latencies and wall time."""
+    latencies = []
+    lock = threading.Lock()
+    pending = iter(jobs)
+
+    def work():
+        while True:
+            with lock:
+                job = next(pending, None)
+            if job is None:
+                return
+            started = time.perf_counter()
+            fn(job)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=work) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - started
+
+
+def _stub_fetchers(comments):
+    from collections import defaultdict
+
+    from backend import fetch_reddit, fetch_youtube
+    from backend.offline_clients import (
+        FakeReddit, RecordedYouTubeClient, fake_reddit_thread, youtube_pages_from_comments
+    )
+
+    youtube = RecordedYouTubeClient(youtube_pages_from_comments(comments))
+    fetch_youtube._get_client = lambda: youtube
+    thread = fake_reddit_thread(comments)
+    reddit = FakeReddit(defaultdict(lambda: thread))
+    fetch_reddit._get_client = lambda: reddit
+
+
+def worker(config):
+    """Benchmark one configuration in this process and return its results."""
+    import torch
+
+    torch.set_num_threads(config["threads"])
+
+    from backend.model_registry import model_registry
+    from backend.sentiment_model import analyze_comments
+
+    started = time.perf_counter()
+    model_registry.load_all()
+    load_wall = time.perf_counter() - started
+    status = model_registry.status()
+    if not status["ready"]:
+        raise RuntimeError(f"Models failed to load: {json.dumps(status['models'])}")
+
+    corpus = synthetic_corpus(config["comments"], config["seed"])
+    size = config["request_size"]
+    requests = [corpus[i:i + size] for i in range(0, len(corpus), size)]
+
+    analyze_comments(requests[0])  # warm-up
+    latencies, wall = _timed_calls(analyze_comments, requests, config["concurrency"])
+    result = {
+        "config": {k: config[k] for k in CONFIG_KEYS},
+        "model_load_seconds": round(sum(m["load_seconds"] for m in status["models"].values()), 2),
+        "model_load_wall_seconds": round(load_wall, 2),
+        "analyze": {
+            "comments": len(corpus),
+            "request_size": size,
+            "comments_per_sec": round(len(corpus) / wall, 1),
+            "latency_ms": latency_summary(latencies)
+        }
+    }
+
+    if config["endpoint_requests"]:
+        from fastapi.testclient import TestClient
+
+        from backend.app import app
+
+        _stub_fetchers(corpus)
+        bodies = [
+            {"platform": platform_name, "input": url}
+            for platform_name, url in itertools.islice(itertools.cycle([
+                ("youtube", "https://www.youtube.com/watch?v=benchmark"),
+                ("reddit", "https://www.reddit.com/r/benchmark/comments/abc/")
+            ]), config["endpoint_requests"])
+        ]
+        with TestClient(app) as client:
+            def post(body):
+                response = client.post("/analyze", json=body)
+                response.raise_for_status()
+                return response.json()["comments_analyzed"]
+
+            post(bodies[0])  # warm-up
+            latencies, wall = _timed_calls(post, bodies, config["concurrency"])
+        result["endpoint"] = {
+            "requests": len(bodies),
+            "requests_per_sec": round(len(bodies) / wall, 2),
+            "latency_ms": latency_summary(latencies)
+        }
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def _worker_env(config, scratch):
+    env = dict(os.environ)
+    env.update({
+        "SENTIMENT_BACKEND": config["backend"],
+        "EMOTION_BACKEND": config["backend"],
+        "INFERENCE_BATCH_SIZE": str(config["batch_size"]),
+        "OMP_NUM_THREADS": str(config["threads"]),
+        "MODEL_LOADING": "lazy",
+        # Score every comment and keep benchmark runs out of the real databases
+        "INFERENCE_CACHE_SIZE": "0",
+        "INFERENCE_CACHE_DB": "",
+        "ANALYSIS_DB": os.path.join(scratch, "analyses.db"),
+        "REDDIT_REQUESTS_PER_MINUTE": "1000000",
+        "LATEST_REFRESH_INTERVAL": "3600"
+    })
+    return env
+
+
+def run(args):
+    results = []
+    for backend, threads, batch_size in itertools.product(args.backends, args.threads, args.batch_sizes):
+        config = {
+            "backend": backend, "threads": threads, "batch_size": batch_size,
+            "concurrency": args.concurrency, "comments": args.comments, "seed": args.seed,
+            "request_size": args.request_size, "endpoint_requests": args.endpoint_requests
+        }
+        print(f"Benchmarking backend={backend} threads={threads} batch_size={batch_size}", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as scratch:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench", "worker", json.dumps(config)],
+                env=_worker_env(config, scratch), capture_output=True, text=True
+            )
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            results.append({"config": {k: config[k] for k in CONFIG_KEYS}, "error": proc.stderr.strip().splitlines()[-1:]})
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    return {"meta": _meta(args), "results": results}
+
+
+def _meta(args):
+    import torch
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "comments": args.comments,
+        "seed": args.seed
+    }
+
+
+def _metric(result, path):
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    return result
+
+
+def compare(baseline, candidate, threshold):
+    """Per-configuration metric deltas, and whether any regressed past `threshold`."""
+    def key(result):
+        config = result["config"]
+        return tuple(config[k] for k in CONFIG_KEYS)
+
+    before = {key(r): r for r in baseline["results"] if "error" not in r}
+    rows, regressed = [], False
+    for result in candidate["results"]:
+        if "error" in result or key(result) not in before:
+            continue
+        for path, higher_is_better in COMPARED_METRICS:
+            old, new = _metric(before[key(result)], path), _metric(result, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            rows.append({
+                "config": dict(zip(CONFIG_KEYS, key(result))),
+                "metric": ".".join(path),
+                "baseline": old,
+                "candidate": new,
+                "change": round(change, 4),
+                "regression": worse > threshold
+            })
+            regressed = regressed or worse > threshold
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyze_comments and /analyze offline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmark matrix")
+    run_parser.add_argument("--batch-sizes", nargs="+", type=int, default=[32])
+    run_parser.add_argument("--threads", nargs="+", type=int, default=[os.cpu_count() or 1])
+    run_parser.add_argument("--backends", nargs="+", choices=["torch", "int8", "onnx"], default=["torch"])
+    run_parser.add_argument("--comments", type=int, default=1000)
+    run_parser.add_argument("--request-size", type=int, default=50, help="Comments per analyze_comments call")
+    run_parser.add_argument("--concurrency", type=int, default=1, help="Calls in flight at once")
+    run_parser.add_argument("--endpoint-requests", type=int, default=20, help="/analyze requests (0 to skip)")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="Write results JSON here as well as to stdout")
+
+    compare_parser = sub.add_parser("compare", help="Diff two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Relative change counted as a regression")
+
+    worker_parser = sub.add_parser("worker")
+    worker_parser.add_argument("config")
+
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        print(json.dumps(worker(json.loads(args.config))))
+    elif args.command == "run":
+        report = run(args)
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        print(output)
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.candidate, encoding="utf-8") as f:
+            candidate = json.load(f)
+        rows, regressed = compare(baseline, candidate, args.threshold)
+        print(json.dumps({"threshold": args.threshold, "regressed": regressed, "metrics": rows}, indent=2))
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Seeded synthetic comment corpus for benchmarks and parity checks.
+
+    python -m benchmarks.corpus --count 2000 --output corpus.txt
+
+Comments mix short reactions, sentence-length opinions and long rants,
+with emoji, punctuation runs, URLs and non-English text, so tokenization
+and padding behave roughly like real YouTube and Reddit threads.
+"""
+import argparse
+import random
+
+OPENERS = [
+    "Honestly", "Not gonna lie", "Ok so", "As someone who watched this twice", "Lol",
+    "Unpopular opinion:", "Great video but", "I disagree,", "This is exactly why", "Wow"
+]
+OPINIONS = [
+    "this is the best explanation I have seen", "the audio quality was terrible",
+    "I would recommend this to anyone starting out", "worst take I have read all week",
+    "it was fine, nothing special", "the editing made it so much better",
+    "I can't believe how wrong the comments are", "this made my day",
+    "the second half dragged on way too long", "it's decent but overhyped",
+    "I love how calm the presenter is", "that ending was scary ngl",
+    "why does nobody talk about the price", "I'm disappointed, expected more"
+]
+DETAILS = [
+    "the examples at 3:42 really helped", "my whole family watched it together",
+    "the sources in the description are broken", "I tried the same setup and it failed",
+    "compared to last year this is a huge step up", "the thumbnail is misleading though",
+    "please do a follow-up on the benchmarks", "I paused it five times to take notes",
+    "the music was way too loud over the voice", "there is a typo in the title"
+]
+MULTILINGUAL = [
+    "बहुत अच्छा वीडियो है", "यह बिल्कुल बेकार था", "muy buen video, gracias",
+    "no me gustó para nada", "c'est vraiment génial", "das war ziemlich enttäuschend",
+    "とても面白かったです", "정말 최고예요", "очень интересно", "molto deludente",
+    "isso foi incrível", "هذا رائع جدا"
+]
+EMOJI = ["😂", "😡", "😍", "😢", "😱", "👍", "🔥", "💀", "🙏", "❤️", ":(", ":)", "🤔"]
+URLS = ["https://example.com/watch?v=abc123", "https://www.reddit.com/r/Python/", "www.example.org/post/42"]
+
+
+def synthetic_comment(rng):
+    kind = rng.random()
+    if kind < 0.25:
+        # Short reaction
+        parts = [rng.choice(OPINIONS).split(",")[0]] if rng.random() < 0.5 else []
+        parts.append("".join(rng.choices(EMOJI, k=rng.randint(1, 4))))
+    elif kind < 0.40:
+        parts = [rng.choice(MULTILINGUAL), rng.choice(EMOJI) if rng.random() < 0.5 else ""]
+    elif kind < 0.85:
+        parts = [rng.choice(OPENERS), rng.choice(OPINIONS) + ".", rng.choice(DETAILS) + "."]
+        if rng.random() < 0.3:
+            parts.append(rng.choice(EMOJI))
+    else:
+        # Long rant: many sentences, sometimes a link and shouting
+        sentences = [rng.choice(OPINIONS + DETAILS) for _ in range(rng.randint(8, 40))]
+        parts = [rng.choice(OPENERS)] + [s.capitalize() + rng.choice([".", "!", "!!!", "..."]) for s in sentences]
+        if rng.random() < 0.3:
+            parts.append(rng.choice(URLS))
+        if rng.random() < 0.2:
+            parts = [p.upper() for p in parts]
+    return " ".join(p for p in parts if p)
+
+
+def synthetic_corpus(count, seed=0):
+    rng = random.Random(seed)
+    return [synthetic_comment(rng) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic comment corpus, one comment per line")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for comment in synthetic_corpus(args.count, args.seed):
+            f.write(comment.replace("\n", " ") + "\n")
+    print(f"Wrote {args.count} comments to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Requests/sec of /analyze as serving workers are added.
+
+    python -m benchmarks.load_test run [--workers 1 2 4] [--concurrency 16] [--requests 200]
+                                       [--comments 50] [--output load.json]
+
+For each worker count, `run` starts `backend.serve` in a subprocess (the
+`server` subcommand: the real server with the YouTube and Reddit fetchers
+replaced by offline_clients fakes returning a synthetic corpus), waits
+until it answers /ready, then posts `--requests` /analyze calls from
+`--concurrency` client threads and records throughput and latency. The
+inference cache is off, so every request is really scored. The speedup
+column is relative to the first worker count.
+"""
+import argparse
+import itertools
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.bench import _stub_fetchers, _timed_calls, latency_summary
+from benchmarks.corpus import synthetic_corpus
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _post(url, body, timeout=300):
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def _wait_ready(base_url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server not ready after {timeout}s")
+
+
+def _server_env(scratch):
+    env = dict(os.environ)
+    env.update({
+        # Score every request and keep load-test runs out of the real databases
+        "INFERENCE_CACHE_SIZE": "0",
+        "INFERENCE_CACHE_DB": "",
+        "ANALYSIS_DB": os.path.join(scratch, "analyses.db"),
+        "REDDIT_REQUESTS_PER_MINUTE": "1000000",
+        "LATEST_REFRESH_INTERVAL": "3600"
+    })
+    return env
+
+
+def measure(workers, threads, args):
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as scratch:
+        command = [sys.executable, "-m", "benchmarks.load_test", "server", "--workers", str(workers),
+                   "--threads", str(threads), "--port", str(port),
+                   "--comments", str(args.comments), "--seed", str(args.seed)]
+        process = subprocess.Popen(command, env=_server_env(scratch), stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL if not args.verbose else None)
+        try:
+            started = time.perf_counter()
+            _wait_ready(base_url, process, args.startup_timeout)
+            startup_seconds = time.perf_counter() - started
+
+            bodies = [
+                {"platform": platform_name, "input": url}
+                for platform_name, url in itertools.islice(itertools.cycle([
+                    ("youtube", "https://www.youtube.com/watch?v=loadtest"),
+                    ("reddit", "https://www.reddit.com/r/loadtest/comments/abc/")
+                ]), args.requests)
+            ]
+            # Warm every worker up; the socket hands connections to whichever worker accepts first
+            _timed_calls(lambda body: _post(f"{base_url}/analyze", body), bodies[:workers * 2], workers * 2)
+
+            errors = []
+
+            def call(body):
+                try:
+                    _post(f"{base_url}/analyze", body)
+                except Exception as e:
+                    errors.append(str(e))
+
+            latencies, wall = _timed_calls(call, bodies, args.concurrency)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        "workers": workers,
+        "threads_per_worker": threads,
+        "requests": len(bodies),
+        "errors": len(errors),
+        "requests_per_sec": round((len(bodies) - len(errors)) / wall, 2),
+        "comments_per_sec": round((len(bodies) - len(errors)) * args.comments / wall, 1),
+        "latency_ms": latency_summary(latencies),
+        "startup_seconds": round(startup_seconds, 1)
+    }
+
+
+def run(args):
+    from backend.serve import available_cores, plan
+
+    cores = available_cores()
+    results = []
+    for workers in args.workers:
+        _, threads = plan(workers, args.threads, cores)
+        print(f"Load testing {workers} workers x {threads} threads", file=sys.stderr)
+        results.append(measure(workers, threads, args))
+
+    base = results[0]["requests_per_sec"] if results else 0
+    for result in results:
+        result["speedup"] = round(result["requests_per_sec"] / base, 2) if base else None
+    return {
+        "cores": cores,
+        "concurrency": args.concurrency,
+        "comments_per_request": args.comments,
+        "results": results
+    }
+
+
+def server(args):
+    """The server under test: backend.serve with offline fetchers (set up before the fork)."""
+    from backend.serve import configure, serve
+
+    configure(args.workers, args.threads)
+    _stub_fetchers(synthetic_corpus(args.comments, args.seed))
+    serve(args.workers, args.threads, "127.0.0.1", args.port, "warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /analyze against backend.serve with N workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Measure throughput for each worker count")
+    run_parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    run_parser.add_argument("--threads", type=int, default=0, help="Per worker; 0: split the cores")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Client threads")
+    run_parser.add_argument("--requests", type=int, default=200)
+    run_parser.add_argument("--comments", type=int, default=50, help="Comments per /analyze request")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--startup-timeout", type=float, default=300)
+    run_parser.add_argument("--verbose", action="store_true", help="Show the server's log output")
+    run_parser.add_argument("--output")
+
+    server_parser = sub.add_parser("server", help=argparse.SUPPRESS)
+    server_parser.add_argument("--workers", type=int, required=True)
+    server_parser.add_argument("--threads", type=int, required=True)
+    server_parser.add_argument("--port", type=int, required=True)
+    server_parser.add_argument("--comments", type=int, default=50)
+    server_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "server":
+        server(args)
+        return
+
+    report = run(args)
+    for result in report["results"]:
+        print(f"{result['workers']:>3} workers x {result['threads_per_worker']} threads: "
+              f"{result['requests_per_sec']:>8} req/s  p95 {result['latency_ms']['p95']} ms  "
+              f"speedup {result['speedup']}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Bytes per retained comment for each analysis result representation.
+
+    python -m benchmarks.memory [--comments 20000] [--output memory.json]
+
+Builds one synthetic analysis three ways and measures each with
+tracemalloc, not counting the comment texts themselves (every
+representation keeps them):
+
+    dicts:    nested result dicts, as analyze_comments returned them before
+    records:  the CommentResult / Prediction objects it returns now
+    retained: the column-wise AnalysisResults that ResultStore keeps for
+              /filter-comments
+
+No models are loaded; labels and scores are drawn at random.
+"""
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+
+from benchmarks.corpus import synthetic_corpus
+
+
+def _measure(build):
+    """(object, bytes still allocated once `build()` returns)."""
+    tracemalloc.start()
+    try:
+        value = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, current
+
+
+def run(count, seed=0):
+    from backend.result_columns import ResultColumns
+    from backend.result_records import CommentResult, Prediction
+    from backend.result_store import AnalysisResults
+    from backend.sentiment_model import sentiment_map, emotion_map
+
+    rng = random.Random(seed)
+    texts = synthetic_corpus(count, seed)
+    sentiments = sorted(set(sentiment_map.values()))
+    emotions = sorted(set(emotion_map.values()))
+    rows = []
+    for text in texts:
+        sentiment, emotion = rng.choice(sentiments), rng.choice(emotions)
+        rows.append((text, sentiment, rng.random(), emotion, rng.random()))
+
+    def dicts():
+        return [
+            {
+                "text": text,
+                "sentiment": {"label": sentiment, "score": round(s_score, 4),
+                              "original_label": sentiment, "source": "model"},
+                "emotion": {"label": emotion, "score": round(e_score, 4),
+                            "original_label": emotion, "source": "model"}
+            }
+            for text, sentiment, s_score, emotion, e_score in rows
+        ]
+
+    def records():
+        return [
+            CommentResult(text, Prediction(sentiment, round(s_score, 4), sentiment, "model"),
+                          Prediction(emotion, round(e_score, 4), emotion, "model"))
+            for text, sentiment, s_score, emotion, e_score in rows
+        ]
+
+    results, _ = _measure(records)
+    columns = ResultColumns.from_results(results)
+
+    sizes = {}
+    for name, build in (("dicts", dicts), ("records", records),
+                        ("retained", lambda: AnalysisResults(results, columns))):
+        value, allocated = _measure(build)
+        sizes[name] = round(allocated / count, 1)
+        del value
+    retained = AnalysisResults(results, columns)
+
+    return {
+        "comments": count,
+        "bytes_per_comment": sizes,
+        "text_bytes_per_comment": round(sum(sys.getsizeof(text) for text in texts) / count, 1),
+        # What ResultStore charges against RESULT_CACHE_BYTES, texts included
+        "store_accounted_bytes_per_comment": round(retained.size_bytes / count, 1),
+        "records_vs_dicts": round(sizes["dicts"] / sizes["records"], 2),
+        "retained_vs_dicts": round(sizes["dicts"] / sizes["retained"], 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory per retained analysis result")
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.comments, args.seed)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1021,8 +1021,8 @@ function setupQuickAnalysis() {
         );
       }
 
-      // Call your FastAPI endpoint
-      const response = await fetch("http://localhost:8000/analyze", {
+      // Call your FastAPI endpoint; partial results stream in as NDJSON
+      const response = await fetch("http://localhost:8000/analyze/stream", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -1037,98 +1037,106 @@ function setupQuickAnalysis() {
         throw new Error("Analysis failed");
       }
 
-      const data = await response.json();
-
-      // Process the response data to display results
-      quickResult.innerHTML = `
-                <div class="analysis-result">
-                    <div class="result-header">
-                        <div class="result-title">Content Analysis</div>
-                        <div class="result-score sentiment-${getSentimentClass(
-                          data.sentiment_stats
-                        )}">
-                            ${calculateOverallSentiment(data.sentiment_stats)}%
-                        </div>
-                    </div>
-                    <div class="emotion-filters">
-                        <h4>Filter by Emotion</h4>
-                        <div class="emotion-buttons">
-                            ${Object.entries(data.emotion_stats)
-                              .map(
-                                ([emotion, count]) => `
-                                <button class="emotion-filter-btn ${emotion}" data-emotion="${emotion}">
-                                    <i class="fas fa-${getEmotionIcon(
-                                      emotion
-                                    )}"></i>
-                                    ${
-                                      emotion.charAt(0).toUpperCase() +
-                                      emotion.slice(1)
-                                    } (${count})
-                                </button>
-                            `
-                              )
-                              .join("")}
-                        </div>
-                    </div>
-                    <div class="filtered-comments">
-                        <h4>Sample Comments</h4>
-                        <div class="comments-list">
-                            ${data.sample_comments
-                              .map(
-                                (comment) => `
-                                <div class="comment-item">
-                                    <p>${comment.text}</p>
-                                    <div class="comment-emotions">
-                                        <span class="sentiment-tag sentiment-${comment.sentiment.label.toLowerCase()}">
-                                            ${comment.sentiment.label}
-                                        </span>
-                                        <span class="emotion-tag ${comment.emotion.label.toLowerCase()}">
-                                            ${comment.emotion.label}
-                                        </span>
-                                    </div>
-                                </div>
-                            `
-                              )
-                              .join("")}
-                        </div>
-                    </div>
-                </div>
-            `;
-
-      // Add event listeners to emotion filter buttons
-      document.querySelectorAll(".emotion-filter-btn").forEach((btn) => {
-        btn.addEventListener("click", function () {
-          const emotion = this.dataset.emotion;
-          const filteredComments = data.sample_comments.filter(
-            (c) => c.emotion.label.toLowerCase() === emotion
-          );
-
-          // Update comments list
-          const commentsList = document.querySelector(".comments-list");
-          commentsList.innerHTML = filteredComments
-            .map(
-              (comment) => `
-                        <div class="comment-item">
-                            <p>${comment.text}</p>
-                            <div class="comment-emotions">
-                                <span class="emotion-tag ${emotion}">
-                                    ${
-                                      emotion.charAt(0).toUpperCase() +
-                                      emotion.slice(1)
-                                    }
-                                </span>
-                            </div>
-                        </div>
-                    `
-            )
-            .join("");
-
-          // Update active state
-          document
-            .querySelectorAll(".emotion-filter-btn")
-            .forEach((b) => b.classList.remove("active"));
-          this.classList.add("active");
+      function renderQuickResult(data) {
+        // Process the response data to display results
+        quickResult.innerHTML = `
+                  <div class="analysis-result">
+                      <div class="result-header">
+                          <div class="result-title">Content Analysis</div>
+                          <div class="result-score sentiment-${getSentimentClass(
+                            data.sentiment_stats
+                          )}">
+                              ${calculateOverallSentiment(data.sentiment_stats)}%
+                          </div>
+                      </div>
+                      <div class="emotion-filters">
+                          <h4>Filter by Emotion</h4>
+                          <div class="emotion-buttons">
+                              ${Object.entries(data.emotion_stats)
+                                .map(
+                                  ([emotion, count]) => `
+                                  <button class="emotion-filter-btn ${emotion}" data-emotion="${emotion}">
+                                      <i class="fas fa-${getEmotionIcon(
+                                        emotion
+                                      )}"></i>
+                                      ${
+                                        emotion.charAt(0).toUpperCase() +
+                                        emotion.slice(1)
+                                      } (${count})
+                                  </button>
+                              `
+                                )
+                                .join("")}
+                          </div>
+                      </div>
+                      <div class="filtered-comments">
+                          <h4>Sample Comments</h4>
+                          <div class="comments-list">
+                              ${data.sample_comments
+                                .map(
+                                  (comment) => `
+                                  <div class="comment-item">
+                                      <p>${comment.text}</p>
+                                      <div class="comment-emotions">
+                                          <span class="sentiment-tag sentiment-${comment.sentiment.label.toLowerCase()}">
+                                              ${comment.sentiment.label}
+                                          </span>
+                                          <span class="emotion-tag ${comment.emotion.label.toLowerCase()}">
+                                              ${comment.emotion.label}
+                                          </span>
+                                      </div>
+                                  </div>
+                              `
+                                )
+                                .join("")}
+                          </div>
+                      </div>
+                  </div>
+              `;
+
+        // Add event listeners to emotion filter buttons
+        document.querySelectorAll(".emotion-filter-btn").forEach((btn) => {
+          btn.addEventListener("click", function () {
+            const emotion = this.dataset.emotion;
+            const filteredComments = data.sample_comments.filter(
+              (c) => c.emotion.label.toLowerCase() === emotion
+            );
+
+            // Update comments list
+            const commentsList = document.querySelector(".comments-list");
+            commentsList.innerHTML = filteredComments
+              .map(
+                (comment) => `
+                          <div class="comment-item">
+                              <p>${comment.text}</p>
+                              <div class="comment-emotions">
+                                  <span class="emotion-tag ${emotion}">
+                                      ${
+                                        emotion.charAt(0).toUpperCase() +
+                                        emotion.slice(1)
+                                      }
+                                  </span>
+                              </div>
+                          </div>
+                      `
+              )
+              .join("");
+
+            // Update active state
+            document
+              .querySelectorAll(".emotion-filter-btn")
+              .forEach((b) => b.classList.remove("active"));
+            this.classList.add("active");
+          });
         });
+      }
+
+      // Re-render on every partial aggregate, then once more with the final result
+      await readAnalysisStream(response, (data) => {
+        if (data.type === "error") {
+          throw new Error(data.error);
+        }
+        renderQuickResult(data);
       });
 
       showNotification("Analysis complete", "success");
@@ -1141,6 +1149,28 @@ function setupQuickAnalysis() {
 }
 
 // Helper functions
+async function readAnalysisStream(response, onEvent) {
+  // Each line of the response body is one JSON event
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let newline;
+    while ((newline = buffer.indexOf("\n")) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) onEvent(JSON.parse(line));
+    }
+  }
+
+  if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
+
 function getSentimentClass(sentimentStats) {
   const positive = sentimentStats.positive || 0;
   const negative = sentimentStats.negative || 0;
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from backend import analysis_store as analysis_store_module
+from backend.aggregates import PlatformAggregates
+from backend.analysis_store import AnalysisStore
+
+
+def entry(platform, days_ago, positive, negative):
+    return {
+        "platform": platform,
+        "url": f"https://example.com/{platform}",
+        "timestamp": (datetime.utcnow() - timedelta(days=days_ago)).isoformat(),
+        "stats": {
+            "total_comments": positive + negative,
+            "sentiment": {"positive": positive, "negative": negative},
+            "emotion": {"joy": positive, "anger": negative}
+        }
+    }
+
+
+def test_retention_is_subtracted_from_running_totals(tmp_path):
+    store = AnalysisStore(str(tmp_path / "analyses.db"))
+    running = PlatformAggregates(store)
+
+    store.append(entry("youtube", 200, 5, 1))
+    store.append(entry("youtube", 0, 2, 2))
+    store.append(entry("reddit", 0, 1, 0))
+    running.refresh()
+    assert running.stats("youtube")["total_comments"] == 10
+
+    # Removed by age, and one removed before the running aggregates ever read it
+    store.append(entry("reddit", 200, 3, 3))
+    assert store.apply_retention(retention_days=90, max_rows=0) == 2
+
+    fresh = PlatformAggregates(store)
+    for platform in ("youtube", "reddit"):
+        assert running.stats(platform) == fresh.stats(platform)
+        for window in PlatformAggregates.WINDOWS:
+            assert running.stats(platform, window) == fresh.stats(platform, window)
+    assert running.stats("youtube") == {
+        "total_analyses": 1, "total_comments": 4,
+        "sentiment_positive": 2, "sentiment_negative": 2, "emotion_joy": 2, "emotion_anger": 2
+    }
+
+    # Removed by the row cap
+    store.append(entry("youtube", 0, 1, 1))
+    assert store.apply_retention(retention_days=0, max_rows=1) == 2
+    assert running.stats("youtube") == PlatformAggregates(store).stats("youtube")
+    assert running.stats("reddit") == PlatformAggregates(store).stats("reddit") == {}
+    store.close()
+
+
+def test_trimmed_removal_log_rebuilds_totals(tmp_path, monkeypatch):
+    store = AnalysisStore(str(tmp_path / "analyses.db"))
+    running = PlatformAggregates(store)
+    store.append(entry("youtube", 200, 5, 1))
+    store.append(entry("youtube", 0, 2, 2))
+    running.refresh()
+
+    # Log entries expire immediately, as if this worker had been idle for days
+    monkeypatch.setattr(analysis_store_module, "ANALYSIS_REMOVAL_LOG_DAYS", -1)
+    store.apply_retention(retention_days=90, max_rows=0)
+
+    assert running.stats("youtube") == PlatformAggregates(store).stats("youtube")
+    assert running.stats("youtube")["total_comments"] == 4
+    store.close()
@@ -0,0 +1,37 @@
+import threading
+import time
+
+from backend.batch_scheduler import BACKGROUND, INTERACTIVE, BatchScheduler
+
+
+def test_results_match_inputs():
+    scheduler = BatchScheduler("upper", lambda texts: [text.upper() for text in texts], max_batch_size=4)
+    try:
+        assert scheduler.predict(["a", "b", "c", "d", "e", "f"], timeout=5) == ["A", "B", "C", "D", "E", "F"]
+    finally:
+        scheduler.stop()
+
+
+def test_interactive_texts_jump_the_background_backlog():
+    batches = []
+    started = threading.Event()
+
+    def predict(texts):
+        batches.append(list(texts))
+        started.set()
+        time.sleep(0.05)
+        return texts
+
+    scheduler = BatchScheduler("priority", predict, max_batch_size=8, max_wait_ms=0)
+    try:
+        background = scheduler.submit([f"job {i}" for i in range(64)], priority=BACKGROUND)
+        started.wait(5)
+        interactive = scheduler.submit(["request"], priority=INTERACTIVE)
+
+        assert interactive[0].result(5) == "request"
+        # Only the batch already running when the request arrived was ahead of it
+        assert sum(1 for batch in batches if "request" in batch) == 1
+        assert next(i for i, batch in enumerate(batches) if "request" in batch) <= 1
+        assert [future.result(5) for future in background] == [f"job {i}" for i in range(64)]
+    finally:
+        scheduler.stop()
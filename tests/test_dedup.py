@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+from backend import dedup, sentiment_model
+from backend.dedup import deduplicate
+
+SPAM = "check out my channel for daily videos about cooking pasta at home"
+WORDS = "one two three four five six seven eight nine ten".split()
+ROTATED = [" ".join(WORDS[i:] + WORDS[:i]) for i in range(len(WORDS))]
+
+
+def test_exact_groups_identical_texts_only():
+    unique, owners = deduplicate(["same text", "other", "same text", "Same text", "other"], mode="exact")
+
+    assert unique == ["same text", "other", "Same text"]
+    assert owners == [0, 1, 0, 2, 1]
+
+
+def test_identical_comments_share_one_prediction_in_order(monkeypatch):
+    scored = []
+
+    def predict_both(sentiment_texts, emotion_texts, batch_size, max_length):
+        scored.append(list(sentiment_texts))
+        predictions = [{"label": "5 stars", "score": 0.5 + i / 100} for i in range(len(sentiment_texts))]
+        return predictions, [{"label": "joy", "score": 0.9}] * len(emotion_texts)
+
+    monkeypatch.setattr(sentiment_model, "_predict_both", predict_both)
+    monkeypatch.setattr(dedup, "DEDUP_MODE", "exact")
+    comments = ["first comment", "second comment", "first comment", "third comment", "second comment"]
+
+    results, _ = sentiment_model.analyze_comments(comments)
+
+    assert scored == [["first comment", "second comment", "third comment"]]
+    assert [result.text for result in results] == comments
+    assert [result.sentiment.score for result in results] == [0.5, 0.51, 0.5, 0.52, 0.51]
+
+
+def test_normalized_merges_case_whitespace_and_repeats():
+    texts = ["FIRST!!!", "first!!", "  First!! ", "great   video", "Great video\n", "great videos"]
+
+    unique, owners = deduplicate(texts, mode="normalized")
+
+    assert unique == ["FIRST!!!", "great   video", "great videos"]
+    assert owners == [0, 0, 0, 1, 1, 2]
+
+
+def test_minhash_merges_near_duplicates_only():
+    texts = [
+        SPAM,
+        SPAM.replace("daily", "weekly"),
+        SPAM.upper() + "!!!",
+        "the second half of this episode was much better than the first one",
+        "check out",
+        "check out my"
+    ]
+
+    unique, owners = deduplicate(texts, mode="minhash")
+
+    assert owners == [0, 0, 0, 1, 2, 3]
+    assert unique == [SPAM, texts[3], "check out", "check out my"]
+
+
+def test_minhash_is_stable_across_runs():
+    # Shingle sets iterate in PYTHONHASHSEED order; the seeded permutations and
+    # blake2b hashes must make signatures and groups independent of it
+    script = (
+        "from backend.dedup import deduplicate, minhash\n"
+        f"print(minhash({SPAM!r}.split()).tolist(), deduplicate({ROTATED!r}, mode='minhash'))\n"
+    )
+    outputs = {
+        subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                       env={**os.environ, "PYTHONHASHSEED": seed}).stdout.strip()
+        for seed in ("1", "2", "3")
+    }
+
+    assert outputs == {f"{dedup.minhash(SPAM.split()).tolist()} {deduplicate(ROTATED, mode='minhash')}"}
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from backend import fetch_reddit
+from backend.offline_clients import FakeReddit, fake_reddit_thread
+
+URL = "https://www.reddit.com/r/test/comments/abc/"
+COMMENTS = [f"comment {i}" for i in range(400)]
+# Few enough visible siblings that most of the thread sits behind "load more"
+THREAD = fake_reddit_thread(COMMENTS, visible=5, branching=20)
+
+
+class ThreadCheckingReddit(FakeReddit):
+    """Records every thread that sends a request through this client."""
+
+    def __init__(self, threads, latency=0.0):
+        super().__init__(threads, latency)
+        self.threads_used = set()
+
+    def _request(self):
+        self.threads_used.add(threading.get_ident())
+        super()._request()
+
+
+@pytest.fixture(autouse=True)
+def unlimited_rate(monkeypatch):
+    monkeypatch.setattr(fetch_reddit, "_rate_limiter", fetch_reddit.RateLimiter(per_minute=1e6, burst=100))
+
+
+def test_expansion_collects_the_whole_thread():
+    reddit = FakeReddit({URL: THREAD})
+
+    found = list(fetch_reddit.iter_comment_bodies(URL, more_requests=1000, time_budget=30, client=reddit))
+
+    assert sorted(found) == sorted(COMMENTS)
+
+
+def test_request_budget_limits_expansion():
+    reddit = FakeReddit({URL: THREAD})
+
+    found = list(fetch_reddit.iter_comment_bodies(URL, more_requests=2, time_budget=30, client=reddit))
+
+    assert len(found) < len(COMMENTS)
+    assert reddit.requests == 3  # the submission plus two expansions
+
+
+def test_sample_is_bounded_and_drawn_from_the_thread():
+    reddit = FakeReddit({URL: THREAD})
+
+    sample = fetch_reddit.get_reddit_comments(URL, max_comments=50, more_requests=1000, client=reddit)
+
+    assert len(sample) == 50
+    assert set(sample) <= set(COMMENTS)
+
+
+def test_rate_limiter_wait_counts_against_the_time_budget(monkeypatch):
+    # One slot, then one more every 6 seconds
+    monkeypatch.setattr(fetch_reddit, "_rate_limiter", fetch_reddit.RateLimiter(per_minute=10, burst=1))
+    reddit = FakeReddit({URL: THREAD})
+
+    started = time.monotonic()
+    first = fetch_reddit.get_reddit_comments(URL, more_requests=1000, time_budget=0.3, client=reddit)
+    second = fetch_reddit.get_reddit_comments(URL, more_requests=1000, time_budget=0.3, client=reddit)
+    elapsed = time.monotonic() - started
+
+    assert first and second == []
+    assert reddit.requests == 1
+    assert elapsed < 1
+
+
+def test_each_thread_uses_its_own_client(monkeypatch):
+    clients = []
+    local = threading.local()
+
+    def get_client():
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = ThreadCheckingReddit({URL: THREAD}, latency=0.005)
+            clients.append(client)
+        return client
+
+    monkeypatch.setattr(fetch_reddit, "_get_client", get_client)
+
+    results = {}
+
+    def fetch(name):
+        results[name] = list(fetch_reddit.iter_comment_bodies(URL, more_requests=1000, time_budget=30))
+
+    workers = [threading.Thread(target=fetch, args=(name,)) for name in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert all(sorted(found) == sorted(COMMENTS) for found in results.values())
+    assert len(clients) > 3  # the callers' plus the expander threads'
+    assert all(len(client.threads_used) == 1 for client in clients)
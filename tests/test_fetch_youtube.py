@@ -0,0 +1,62 @@
+import threading
+
+from backend import fetch_youtube
+from backend.offline_clients import RecordedYouTubeClient, youtube_pages_from_comments
+
+
+class ThreadCheckingClient(RecordedYouTubeClient):
+    """Records every thread that issues a request through this client."""
+
+    def __init__(self, pages, latency=0.0):
+        super().__init__(pages, latency)
+        self.threads = set()
+
+    def commentThreads(self):
+        self.threads.add(threading.get_ident())
+        return self
+
+
+def test_prefetch_threads_use_their_own_clients(monkeypatch):
+    comments = [f"comment {i}" for i in range(1000)]
+    clients = []
+
+    def build(*args, **kwargs):
+        client = ThreadCheckingClient(youtube_pages_from_comments(comments), latency=0.01)
+        clients.append(client)
+        return client
+
+    monkeypatch.setattr(fetch_youtube, "build", build)
+
+    # Several generators advanced alternately from different threads, as
+    # /analyze/stream does with its fetch pool
+    results = {}
+
+    def consume(name):
+        results[name] = list(fetch_youtube.iter_youtube_comments("https://www.youtube.com/watch?v=x"))
+
+    workers = [threading.Thread(target=consume, args=(name,)) for name in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert all(texts == comments for texts in results.values())
+    assert clients
+    assert all(len(client.threads) == 1 for client in clients)
+    assert not any(ident == threading.get_ident() for client in clients for ident in client.threads)
+
+
+def test_explicit_client_is_used_for_every_page():
+    comments = [f"comment {i}" for i in range(250)]
+    client = RecordedYouTubeClient(youtube_pages_from_comments(comments))
+
+    assert list(fetch_youtube.iter_youtube_comments("https://www.youtube.com/watch?v=x", client=client)) == comments
+    assert client.calls == 3
+
+
+def test_max_items_stops_requesting_pages():
+    comments = [f"comment {i}" for i in range(1000)]
+    client = RecordedYouTubeClient(youtube_pages_from_comments(comments))
+
+    assert len(fetch_youtube.get_youtube_comments("https://www.youtube.com/watch?v=x", 150, client=client)) == 150
+    assert client.calls == 2
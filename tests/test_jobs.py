@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from backend import jobs
+from backend.inference_pool import PoolSaturated, PoolTimeout
+
+
+def runner(tmp_path, analyze):
+    return jobs.JobRunner(jobs.JobStore(str(tmp_path / "jobs.db")), {}, analyze, None, None)
+
+
+@pytest.fixture(autouse=True)
+def short_timeout(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_INFERENCE_TIMEOUT", 0.05)
+    monkeypatch.setattr(jobs, "JOB_MAX_RETRIES", 2)
+
+
+def test_slow_batch_is_waited_on_not_resubmitted(tmp_path):
+    submitted = []
+
+    def analyze(comments):
+        future = Future()
+        submitted.append(future)
+        # Finishes during the second timeout period
+        threading.Timer(0.08, future.set_result, args=("scored",)).start()
+        return future
+
+    assert asyncio.run(runner(tmp_path, analyze)._analyze(["a", "b"])) == "scored"
+    assert len(submitted) == 1
+
+
+def test_batch_fails_after_max_retries(tmp_path):
+    submitted = []
+
+    def analyze(comments):
+        submitted.append(Future())
+        return submitted[-1]
+
+    with pytest.raises(PoolTimeout):
+        asyncio.run(runner(tmp_path, analyze)._analyze(["a"]))
+    assert len(submitted) == 1
+    assert submitted[0].cancelled()
+
+
+def test_saturated_pool_is_retried(tmp_path, monkeypatch):
+    attempts = []
+
+    def analyze(comments):
+        attempts.append(comments)
+        if len(attempts) < 3:
+            raise PoolSaturated("full")
+        future = Future()
+        future.set_result("scored")
+        return future
+
+    sleep = asyncio.sleep
+    monkeypatch.setattr(jobs.asyncio, "sleep", lambda seconds: sleep(0))
+
+    assert asyncio.run(runner(tmp_path, analyze)._analyze(["a"])) == "scored"
+    assert len(attempts) == 3
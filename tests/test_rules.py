@@ -0,0 +1,76 @@
+import json
+import random
+
+from backend.rules import RuleSet, rules_from_dicts, rules_from_file
+from backend.sentiment_model import EMOTION_OVERRIDES, SENTIMENT_KEYWORDS
+
+
+def loop_match(sentiment_keywords, emotion_overrides, text):
+    """The per-rule loop the automaton replaced: first matching rule wins."""
+    text_lower = text.lower()
+    sentiment = emotion = None
+    for label, keywords in sentiment_keywords.items():
+        if any(keyword.lower() in text_lower for keyword in keywords):
+            sentiment = label
+            break
+    for pattern, label in emotion_overrides.items():
+        if pattern in text_lower or pattern in text:
+            emotion = label
+            break
+    return sentiment, emotion
+
+
+def random_texts(words, count, seed):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = [rng.choice(words) for _ in range(rng.randint(0, 12))]
+        # Glue some words together so patterns also occur inside other words
+        texts.append("".join(part + rng.choice([" ", "", "!"]) for part in parts))
+    return texts
+
+
+def test_builtin_rules_match_the_rule_loop():
+    rules = rules_from_dicts(SENTIMENT_KEYWORDS, EMOTION_OVERRIDES)
+    words = [word for keywords in SENTIMENT_KEYWORDS.values() for word in keywords]
+    words += list(EMOTION_OVERRIDES) + ["LOVE", "Worst", "CRAP", "video", "the", "hot", "garbage", "cra", "😀", ":"]
+
+    for text in random_texts(words, 3000, seed=0):
+        assert rules.match(text) == loop_match(SENTIMENT_KEYWORDS, EMOTION_OVERRIDES, text), text
+
+
+def test_overlapping_rules_match_the_rule_loop():
+    # Patterns that are prefixes, suffixes and substrings of one another
+    rng = random.Random(1)
+    alphabet = "abc"
+    for _ in range(200):
+        sentiment_keywords = {
+            label: ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(3)]
+            for label in ("positive", "negative", "neutral")
+        }
+        emotion_overrides = {
+            "".join(rng.choice(alphabet + "AB") for _ in range(rng.randint(1, 3))): label
+            for label in ("anger", "joy", "sadness")
+        }
+        rules = rules_from_dicts(sentiment_keywords, emotion_overrides)
+        for _ in range(50):
+            text = "".join(rng.choice(alphabet + "AB ") for _ in range(rng.randint(0, 15)))
+            assert rules.match(text) == loop_match(sentiment_keywords, emotion_overrides, text), text
+
+
+def test_file_keywords_match_case_insensitively(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "sentiment": [{"label": "Positive", "keywords": ["iPhone"]}],
+        "emotion": [{"pattern": "😡", "label": "Anger"}]
+    }), encoding="utf-8")
+
+    rules = rules_from_file(str(path))
+    assert rules.match("My new iPhone 😡") == ("positive", "anger")
+    assert rules.match("IPHONE") == ("positive", None)
+
+
+def test_priorities_override_file_order():
+    rules = RuleSet([("good", "positive", 1), ("not good", "negative", 0)], [])
+    assert rules.match("this is not good") == ("negative", None)
+    assert rules.match("this is good") == ("positive", None)
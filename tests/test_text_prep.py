@@ -0,0 +1,107 @@
+import torch
+
+from backend.model_registry import LoadedModel
+from backend.sentiment_model import _predict_batched
+from backend.text_prep import MAX_CHUNKS, clean_text, model_text, token_windows
+
+
+class WordTokenizer:
+    """One token per word ("a" -> 1, "b" -> 2, anything else -> 3), with
+    overflowing windows the way fast tokenizers report them."""
+
+    model_max_length = 512
+
+    def _ids(self, text):
+        return [{"a": 1, "b": 2}.get(word, 3) for word in text.split()]
+
+    def __call__(self, texts, truncation=True, max_length=None, return_overflowing_tokens=False, stride=0):
+        encoded = {"input_ids": [], "attention_mask": [], "overflow_to_sample_mapping": []}
+        for owner, text in enumerate(texts):
+            ids = self._ids(text)
+            start = 0
+            while True:
+                window = ids[start:start + max_length]
+                encoded["input_ids"].append(window)
+                encoded["attention_mask"].append([1] * len(window))
+                encoded["overflow_to_sample_mapping"].append(owner)
+                if not return_overflowing_tokens or start + max_length >= len(ids):
+                    break
+                start += max_length - stride
+        return encoded
+
+    def pad(self, rows, return_tensors="pt"):
+        width = max(len(row["input_ids"]) for row in rows)
+        return {
+            key: torch.tensor([row[key] + [0] * (width - len(row[key])) for row in rows])
+            for key in ("input_ids", "attention_mask")
+        }
+
+
+class CountingRunner:
+    """Logits per label: how many of the window's tokens are "a" and "b"."""
+
+    def __call__(self, batch):
+        ids = batch["input_ids"]
+        return torch.stack([(ids == 1).sum(dim=-1), (ids == 2).sum(dim=-1)], dim=-1).float()
+
+
+def loaded():
+    return LoadedModel("stub", "torch", CountingRunner(), WordTokenizer(), {0: "A", 1: "B"})
+
+
+def test_short_text_is_one_plain_window():
+    windows, owners = token_windows(WordTokenizer(), ["a b a", "b"], max_length=8)
+
+    assert owners == [0, 1]
+    assert windows["input_ids"] == [[1, 2, 1], [2]]
+
+
+def test_long_text_is_split_into_overlapping_windows():
+    text = " ".join(["a"] * 10 + ["b"] * 10)
+
+    windows, owners = token_windows(WordTokenizer(), [text, "b"], max_length=8, stride=2, max_chunks=8)
+
+    assert owners == [0, 0, 0, 1]
+    assert [len(ids) for ids in windows["input_ids"]] == [8, 8, 8, 1]
+    # Consecutive windows share `stride` tokens
+    assert windows["input_ids"][0][-2:] == windows["input_ids"][1][:2]
+
+
+def test_windows_are_capped_at_max_chunks():
+    text = " ".join(["a"] * 100)
+
+    windows, owners = token_windows(WordTokenizer(), [text, "a"], max_length=8, stride=2, max_chunks=3)
+
+    assert owners == [0, 0, 0, 1]
+    assert len(windows["input_ids"]) == 4
+
+    windows, owners = token_windows(WordTokenizer(), [text], max_length=8)
+    assert len(windows["input_ids"]) == len(owners) == MAX_CHUNKS
+
+
+def test_long_text_label_is_the_weighted_mean_over_its_windows():
+    text = " ".join(["a"] * 6 + ["b"] * 2 + ["b"] * 5 + ["x"] * 3)
+    windows, _ = token_windows(WordTokenizer(), [text], max_length=8)
+    assert len(windows["input_ids"]) > 1
+
+    probs = [CountingRunner()({"input_ids": torch.tensor([ids])}).softmax(dim=-1)[0] for ids in windows["input_ids"]]
+    weights = [len(ids) for ids in windows["input_ids"]]
+    expected = sum(p * w for p, w in zip(probs, weights)) / sum(weights)
+
+    [prediction] = _predict_batched(loaded(), [text], batch_size=1, max_length=8)
+
+    assert prediction["label"] == ("A", "B")[int(expected.argmax())]
+    assert abs(prediction["score"] - float(expected.max())) < 1e-6
+
+
+def test_short_text_is_scored_as_before():
+    [prediction] = _predict_batched(loaded(), ["a a b"], batch_size=4, max_length=8)
+
+    assert prediction["label"] == "A"
+    assert abs(prediction["score"] - float(torch.tensor([2.0, 1.0]).softmax(dim=-1)[0])) < 1e-6
+
+
+def test_clean_text_and_model_text():
+    assert clean_text("  I <b>love</b> it &amp;<br>more  ") == "I love it & more"
+    assert clean_text("a<b and c>d") == "a<b and c>d"
+    assert model_text("see https://example.com/x now") == "see http now"
@@ -0,0 +1,57 @@
+import re
+from datetime import datetime, timezone
+
+from backend.analysis_store import AnalysisStore
+from backend.trends import TrendEngine
+
+NOW = datetime(2026, 3, 10, 12, 30, tzinfo=timezone.utc).timestamp()
+
+
+def engine(tmp_path):
+    store = AnalysisStore(str(tmp_path / "analyses.db"))
+    return store, TrendEngine(store, ["negative", "neutral", "positive"], ["anger", "joy"],
+                              {"positive": 3, "neutral": 2, "negative": 1})
+
+
+def test_multi_day_window_labels_carry_the_date(tmp_path):
+    store, trends = engine(tmp_path)
+
+    labels, series, _ = trends.trends(["youtube"], window_hours=720, now=NOW)
+
+    assert len(labels) == len(series["youtube"]) == 48
+    assert len(set(labels)) == len(labels)
+    assert all(re.fullmatch(r"[A-Z][a-z]{2} \d{2} \d{2}:00", label) for label in labels)
+    assert labels[-1] == "Mar 09 22:00"  # the last 15-hour bucket ends with the current hour
+    store.close()
+
+
+def test_label_formats_by_window(tmp_path):
+    store, trends = engine(tmp_path)
+
+    day, _, _ = trends.trends(["youtube"], window_hours=24, now=NOW)
+    assert day[-1] == "12:00" and len(day) == 24
+
+    week, _, _ = trends.trends(["youtube"], window_hours=72, resolution_hours=6, now=NOW)
+    assert week[-1] == "Mar 10 07:00"
+
+    daily, _, _ = trends.trends(["youtube"], window_hours=168, resolution_hours=24, now=NOW)
+    assert daily[-1] == "Mar 09" and len(daily) == 7  # starts at 13:00 the day before
+    store.close()
+
+
+def test_counts_land_in_their_hour(tmp_path):
+    store, trends = engine(tmp_path)
+    store.append({
+        "platform": "youtube",
+        "url": "https://www.youtube.com/watch?v=x",
+        "timestamp": datetime(2026, 3, 10, 11, 5).isoformat(),
+        "stats": {"total_comments": 4, "sentiment": {"positive": 3, "negative": 1}, "emotion": {"joy": 4}}
+    })
+
+    labels, series, emotions = trends.trends(["youtube", "reddit"], window_hours=3, now=NOW)
+
+    assert labels == ["10:00", "11:00", "12:00"]
+    assert series["youtube"] == [None, 75.0, None]
+    assert series["reddit"] == [None, None, None]
+    assert emotions == {"anger": 0.0, "joy": 100.0}
+    store.close()